@@ -4,13 +4,20 @@ Generates natural language explanations for flight recommendations using SHAP +
 """
 
 import json
-from agents.state import TravelState
+from agents.state import TravelState, DEGRADED
+from llm.groq_client import StreamInterrupted
 from llm.prompts import FLIGHT_EXPLANATION_PROMPT
 from ml.shap_explainer import format_shap_explanation
 
 
-def explanation_agent(state: TravelState, llm_client) -> dict:
-    """Generate LLM-powered explanation for the recommended flight."""
+INPUT_FIELDS = ("recommended_flight", "priority", "budget")
+
+
+async def explanation_agent(state: TravelState, llm_client, emit=None) -> dict:
+    """Generate LLM-powered explanation for the recommended flight.
+
+    If ``emit`` is given, tokens are pushed to it as "chunk" events while they stream in.
+    """
     recommended = state.get("recommended_flight")
     if not recommended:
         return {"flight_explanation": "No flight recommendation available to explain."}
@@ -50,12 +57,27 @@ def explanation_agent(state: TravelState, llm_client) -> dict:
         {"role": "user", "content": prompt},
     ]
 
+    fallback = (
+        f"I recommend **{recommended.get('airline')} {recommended.get('flight_number')}** -- "
+        f"scoring {ccs_score}/100 on our Convenience Score. {shap_text}"
+    )
     try:
-        explanation = llm_client.chat(messages, model=llm_client.fast_model, temperature=0.4, max_tokens=400)
+        if emit:
+            tokens = []
+            async for token in llm_client.astream_chat(messages, model=llm_client.fast_model, temperature=0.4,
+                                                          max_tokens=400, tag="flight_explanation"):
+                tokens.append(token)
+                await emit({"type": "chunk", "content": token})
+            explanation = "".join(tokens)
+            if not explanation:
+                raise RuntimeError("Empty LLM stream")
+        else:
+            explanation = await llm_client.achat(messages, model=llm_client.fast_model, temperature=0.4, max_tokens=400,
+                                               tag="flight_explanation")
+    except StreamInterrupted as e:
+        # Keep what the user already saw and complete it from the SHAP summary
+        return {"flight_explanation": f"{e.partial}\n\n{fallback}", DEGRADED: True}
     except Exception:
-        explanation = (
-            f"I recommend **{recommended.get('airline')} {recommended.get('flight_number')}** -- "
-            f"scoring {ccs_score}/100 on our Convenience Score. {shap_text}"
-        )
+        return {"flight_explanation": fallback, DEGRADED: True}
 
     return {"flight_explanation": explanation}
@@ -4,10 +4,15 @@ Searches, scores, and ranks flights using delay prediction + CCS.
 """
 
 from agents.state import TravelState
-from database.database import SessionLocal
-from database.models import Flight
+from database.database import ReadSessionLocal
+from database.queries import route_schedules
 from ml.delay_predictor import FlightDelayPredictor
 from ml.ccs_calculator import rank_flights
+from ml.precompute_predictions import predict_flights
+
+
+# State fields read by this agent (memo key); travel_date is unused since flights match on route only
+INPUT_FIELDS = ("source", "destination", "priority", "budget")
 
 
 def flight_agent(state: TravelState, delay_predictor: FlightDelayPredictor) -> dict:
@@ -20,22 +25,12 @@ def flight_agent(state: TravelState, delay_predictor: FlightDelayPredictor) -> d
     if not source or not destination:
         return {"available_flights": [], "ranked_flights": [], "recommended_flight": None}
 
-    db = SessionLocal()
+    db = ReadSessionLocal()
     try:
-        query = db.query(Flight).filter(
-            Flight.source == source,
-            Flight.destination == destination,
-        )
-
-        # Filter by stops preference
-        if budget == "budget":
-            query = query.filter(Flight.stops <= 1)
-        else:
-            query = query.filter(Flight.stops <= 1)
+        # Unique schedules, filtered by stops preference
+        flights_data = route_schedules(db, source, destination, max_stops=1, limit=20)
 
-        flights_orm = query.all()
-
-        if not flights_orm:
+        if not flights_data:
             return {
                 "available_flights": [],
                 "ranked_flights": [],
@@ -44,39 +39,8 @@ def flight_agent(state: TravelState, delay_predictor: FlightDelayPredictor) -> d
                 "response_type": "general",
             }
 
-        # Deduplicate by flight_number (take first occurrence)
-        seen = set()
-        unique_flights = []
-        for f in flights_orm:
-            if f.flight_number not in seen:
-                seen.add(f.flight_number)
-                unique_flights.append(f)
-
-        # Convert to dicts
-        flights_data = []
-        for f in unique_flights[:20]:  # Limit to 20 for processing
-            flights_data.append({
-                "id": f.id,
-                "flight_number": f.flight_number,
-                "airline": f.airline,
-                "source": f.source,
-                "destination": f.destination,
-                "departure_time": f.departure_time,
-                "arrival_time": f.arrival_time,
-                "duration_mins": f.duration_mins,
-                "price": f.price,
-                "aircraft_type": f.aircraft_type,
-                "stops": f.stops,
-                "day_of_week": f.day_of_week or 3,
-                "month": f.month or 6,
-                "historical_delay_rate": f.historical_delay_rate or 0.15,
-                "historical_ontime_rate": f.historical_ontime_rate or 0.85,
-                "airline_sentiment_score": f.airline_sentiment_score or 0.7,
-                "congestion_index": f.congestion_index or 0.5,
-            })
-
-        # Run delay predictions
-        flights_with_predictions = delay_predictor.predict_batch(flights_data)
+        # Read precomputed delay predictions (online inference only for misses)
+        flights_with_predictions = predict_flights(db, delay_predictor, flights_data)
 
         # Rank with CCS
         ranked = rank_flights(flights_with_predictions, priority, budget)
@@ -4,36 +4,149 @@ Wires all 7 agents into a state graph with conditional routing.
 """
 
 import json
-from typing import Optional
-from agents.state import TravelState
+import asyncio
+import hashlib
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, List, Optional
+from agents.state import TravelState, DEGRADED
 from agents.intent_agent import intent_agent
-from agents.flight_agent import flight_agent
-from agents.risk_agent import risk_agent
-from agents.explanation_agent import explanation_agent
-from agents.hotel_agent import hotel_agent
-from agents.itinerary_agent import itinerary_agent
-from agents.replan_agent import replan_agent
+from agents.flight_agent import flight_agent, INPUT_FIELDS as FLIGHT_INPUTS
+from agents.risk_agent import risk_agent, INPUT_FIELDS as RISK_INPUTS
+from agents.explanation_agent import explanation_agent, INPUT_FIELDS as EXPLANATION_INPUTS
+from agents.hotel_agent import hotel_agent, INPUT_FIELDS as HOTEL_INPUTS
+from agents.itinerary_agent import itinerary_agent, INPUT_FIELDS as ITINERARY_INPUTS
+from agents.turn_analysis_agent import turn_analysis_agent
 from ml.delay_predictor import FlightDelayPredictor
-from llm.groq_client import GroqLLMClient
+from llm.groq_client import GroqLLMClient, StreamInterrupted
 from llm.prompts import GENERAL_CHAT_PROMPT
 from rag.retriever import RAGRetriever
+from rag.intent_cache import SemanticIntentCache
 from utils.helpers import IATA_TO_CITY
 
+# State fields each memoised agent reads (declared next to each agent)
+AGENT_INPUTS = {
+    flight_agent: FLIGHT_INPUTS,
+    risk_agent: RISK_INPUTS,
+    explanation_agent: EXPLANATION_INPUTS,
+    hotel_agent: HOTEL_INPUTS,
+    itinerary_agent: ITINERARY_INPUTS,
+}
+
+GENERAL_CHAT_FALLBACK = "I'm having trouble connecting to my AI backend right now. Could you try again in a moment?"
+
+# Async callback receiving websocket-style events ({"type": "chunk" | "flight_results" | ...})
+Emit = Optional[Callable[[dict], Awaitable[None]]]
+
+
+def input_hash(state: TravelState, fields, extra=None) -> str:
+    """Hash of the given state fields (plus any extra key material)."""
+    payload = json.dumps([{f: state.get(f) for f in fields}, extra], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def trip_plan_data(state: TravelState) -> dict:
+    """Payload of the "trip_plan" event."""
+    return {
+        "source": state.get("source"),
+        "destination": state.get("destination"),
+        "travel_date": state.get("travel_date"),
+        "num_days": state.get("num_days"),
+        "budget": state.get("budget"),
+        "recommended_flight": state.get("recommended_flight"),
+        "recommended_hotels": state.get("recommended_hotels", []),
+        "itinerary": state.get("itinerary"),
+        "food_recommendations": state.get("food_recommendations", []),
+    }
+
 
 class TravelAgentPipeline:
     """Orchestrates the 7-agent pipeline for travel planning."""
 
     def __init__(self, llm_client: GroqLLMClient, delay_predictor: FlightDelayPredictor,
-                 rag_retriever: Optional[RAGRetriever] = None):
+                 rag_retriever: Optional[RAGRetriever] = None, max_workers: int = 8,
+                 intent_cache: Optional[SemanticIntentCache] = None):
         self.llm = llm_client
         self.delay_predictor = delay_predictor
         self.rag = rag_retriever
+        self.intent_cache = intent_cache
+        # LLM-bound agents are coroutines on the event loop; only blocking DB/ML work
+        # (flight search and scoring) takes a thread from this pool
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agent")
+
+    async def _memoized(self, agent: Callable, state: TravelState, compute: Callable[[], Awaitable[dict]],
+                        extra=None) -> dict:
+        """Return the agent's stored output if its declared inputs are unchanged, else compute it.
+
+        Memo entries live in state["agent_memo"] so they persist with the session. Outputs the
+        agent marked as degraded (LLM fallbacks) are returned but not stored, so the next turn
+        retries instead of replaying the fallback.
+        """
+        name = agent.__name__
+        memo = state.setdefault("agent_memo", {})
+        key = input_hash(state, AGENT_INPUTS[agent], extra)
+        entry = memo.get(name)
+        if entry and entry["hash"] == key:
+            return dict(entry["output"])
+        output = dict(await compute())
+        if output.pop(DEGRADED, False):
+            memo.pop(name, None)
+        else:
+            memo[name] = {"hash": key, "output": output}
+        return dict(output)
+
+    async def _run_concurrently(self, state: TravelState, agents: List[Callable], emit: Emit = None) -> None:
+        """Run independent agents on snapshots of the state and merge their updates in list order.
+
+        Agents whose inputs are unchanged since their last run reuse their memoised output.
+        With ``emit``, risk warnings are pushed as soon as the risk agent finishes, and the
+        trip plan once, after all agents have been merged.
+        """
+        state.setdefault("agent_memo", {})
+
+        async def run_agent(agent: Callable) -> dict:
+            snapshot = dict(state)
+            base = getattr(agent, "func", agent)  # unwrap functools.partial
+            updates = await self._memoized(base, snapshot, lambda: agent(snapshot, self.llm))
+            if emit and updates.get("risk_warnings"):
+                await emit({"type": "risk_warnings", "data": updates["risk_warnings"]})
+            return updates
+
+        results = await asyncio.gather(*(run_agent(agent) for agent in agents))
+        for updates in results:
+            state.update(updates)
+        if emit and any(u.get("recommended_hotels") or u.get("itinerary") for u in results):
+            await emit({"type": "trip_plan", "data": trip_plan_data(state)})
+
+    async def _run_flight_agent(self, state: TravelState, emit: Emit = None) -> None:
+        """Flight search and scoring are blocking DB/ML work, so run them on the executor."""
+        loop = asyncio.get_running_loop()
+        # Scores depend on the delay model, so its version is part of the memo key
+        model_version = getattr(self.delay_predictor, "model_version", None)
+        flight_updates = await self._memoized(
+            flight_agent, state,
+            lambda: loop.run_in_executor(self.executor, flight_agent, dict(state), self.delay_predictor),
+            extra=model_version,
+        )
+        state.update(flight_updates)
+        if emit and state.get("ranked_flights"):
+            await emit({"type": "flight_results", "data": state["ranked_flights"][:5]})
 
-    def run(self, state: TravelState) -> TravelState:
-        """Execute the multi-agent pipeline based on user input."""
+    async def arun(self, state: TravelState, emit: Emit = None) -> TravelState:
+        """Execute the multi-agent pipeline based on user input.
+
+        If ``emit`` is given, explanation and general-chat tokens are streamed to it as "chunk"
+        events, and flight_results / risk_warnings / trip_plan events are pushed as each agent
+        finishes. The returned state's response_text is always the complete reply.
+        """
         try:
-            # Step 1: Intent extraction (always runs first)
-            intent_updates = intent_agent(state, self.llm)
+            # Step 1: Intent extraction (always runs first). With an existing trip, a single
+            # turn-analysis call also detects replan requests
+            has_existing_trip = state.get("ranked_flights") or state.get("itinerary")
+            if has_existing_trip:
+                intent_updates, replan_updates = await turn_analysis_agent(state, self.llm)
+            else:
+                intent_updates = await intent_agent(state, self.llm, self.intent_cache)
             state.update(intent_updates)
 
             # If clarification needed, return early
@@ -42,13 +155,11 @@ class TravelAgentPipeline:
                 return state
 
             # Check if this is a replan request (if existing trip data)
-            has_existing_trip = state.get("ranked_flights") or state.get("itinerary")
             if has_existing_trip:
-                replan_updates = replan_agent(state, self.llm)
                 state.update(replan_updates)
 
                 if state.get("requires_replanning"):
-                    return self._handle_replan(state)
+                    return await self._handle_replan(state, emit)
 
             # Check if we have enough info for a full search
             source = state.get("source")
@@ -56,32 +167,21 @@ class TravelAgentPipeline:
 
             if not source or not destination:
                 # General chat / question
-                return self._handle_general_chat(state)
+                return await self._handle_general_chat(state, emit)
 
             # Step 2: Flight search + ranking
-            flight_updates = flight_agent(state, self.delay_predictor)
-            state.update(flight_updates)
+            await self._run_flight_agent(state, emit)
 
             if not state.get("ranked_flights"):
-                return self._handle_general_chat(state)
+                return await self._handle_general_chat(state, emit)
 
-            # Step 3: Risk analysis
-            risk_updates = risk_agent(state, self.llm)
-            state.update(risk_updates)
-
-            # Step 4: Explanation generation
-            expl_updates = explanation_agent(state, self.llm)
-            state.update(expl_updates)
-
-            # Step 5: Hotel recommendations
-            hotel_updates = hotel_agent(state, self.llm)
-            state.update(hotel_updates)
-
-            # Step 6: Itinerary + food recommendations (always run when trip found)
+            # Steps 3-6 run concurrently: risk analysis and explanation depend only on the
+            # flight results, hotels and itinerary only on the extracted intent
             if not state.get("num_days"):
                 state["num_days"] = 3  # default to 3 days
-            itin_updates = itinerary_agent(state, self.llm)
-            state.update(itin_updates)
+            # The explanation opens the composed reply, so its tokens can be streamed as they arrive
+            explain = partial(explanation_agent, emit=emit) if emit else explanation_agent
+            await self._run_concurrently(state, [risk_agent, explain, hotel_agent, itinerary_agent], emit)
 
             # Compose final response
             state["response_type"] = "trip_plan"
@@ -95,54 +195,28 @@ class TravelAgentPipeline:
             state["response_text"] = f"I encountered an issue while planning your trip. Please try again. (Error: {str(e)[:100]})"
             return state
 
-    def _handle_replan(self, state: TravelState) -> TravelState:
-        """Handle replanning based on change type."""
+    async def _handle_replan(self, state: TravelState, emit: Emit = None) -> TravelState:
+        """Handle replanning by re-running the plan stages against their memoised outputs.
+
+        Only agents whose declared inputs changed actually run, e.g. a duration change
+        reruns hotels and itinerary, a budget change re-ranks flights and everything
+        downstream, and a passenger change reruns nothing.
+        """
         change_type = state.get("replan_change_type", "no_change")
 
-        if change_type in ("date_change", "priority_change"):
-            flight_updates = flight_agent(state, self.delay_predictor)
-            state.update(flight_updates)
-            risk_updates = risk_agent(state, self.llm)
-            state.update(risk_updates)
-            expl_updates = explanation_agent(state, self.llm)
-            state.update(expl_updates)
-
-        elif change_type in ("duration_change",):
-            itin_updates = itinerary_agent(state, self.llm)
-            state.update(itin_updates)
-
-        elif change_type in ("budget_change",):
-            hotel_updates = hotel_agent(state, self.llm)
-            state.update(hotel_updates)
-            # Re-rank flights with new budget
-            flight_updates = flight_agent(state, self.delay_predictor)
-            state.update(flight_updates)
-
-        elif change_type in ("passenger_change",):
-            pass  # Just update cost
-
-        elif change_type in ("destination_change",):
-            # Full replan
-            flight_updates = flight_agent(state, self.delay_predictor)
-            state.update(flight_updates)
-            if state.get("ranked_flights"):
-                risk_updates = risk_agent(state, self.llm)
-                state.update(risk_updates)
-                expl_updates = explanation_agent(state, self.llm)
-                state.update(expl_updates)
-            hotel_updates = hotel_agent(state, self.llm)
-            state.update(hotel_updates)
+        if change_type != "no_change":
+            await self._run_flight_agent(state, emit)
             if not state.get("num_days"):
                 state["num_days"] = 3
-            itin_updates = itinerary_agent(state, self.llm)
-            state.update(itin_updates)
+            agents = [risk_agent, explanation_agent] if state.get("ranked_flights") else []
+            await self._run_concurrently(state, agents + [hotel_agent, itinerary_agent], emit)
 
         state["response_type"] = "replan"
         confirm = state.get("response_text", "")
         state["response_text"] = confirm or "[OK] Your trip plan has been updated!"
         return state
 
-    def _handle_general_chat(self, state: TravelState) -> TravelState:
+    async def _handle_general_chat(self, state: TravelState, emit: Emit = None) -> TravelState:
         """Handle general questions via LLM with RAG context."""
         user_message = state.get("user_message", "")
         conversation_history = state.get("conversation_history", [])
@@ -160,7 +234,7 @@ class TravelAgentPipeline:
 
         rag_context = ""
         if self.rag and self.rag.is_initialized:
-            rag_context = self.rag.retrieve_context(user_message, k=3)
+            rag_context = await asyncio.to_thread(self.rag.retrieve_context, user_message, k=3)
 
         prompt = GENERAL_CHAT_PROMPT.format(
             context=context or "No prior context",
@@ -174,9 +248,22 @@ class TravelAgentPipeline:
         ]
 
         try:
-            response = self.llm.chat(messages, model=self.llm.fast_model, temperature=0.5, max_tokens=500)
+            if emit:
+                tokens = []
+                async for token in self.llm.astream_chat(messages, model=self.llm.fast_model, temperature=0.5,
+                                                          max_tokens=500, tag="general_chat"):
+                    tokens.append(token)
+                    await emit({"type": "chunk", "content": token})
+                response = "".join(tokens)
+                if not response:
+                    raise RuntimeError("Empty LLM stream")
+            else:
+                response = await self.llm.achat(messages, model=self.llm.fast_model, temperature=0.5, max_tokens=500,
+                                               tag="general_chat")
+        except StreamInterrupted as e:
+            response = f"{e.partial}\n\n{GENERAL_CHAT_FALLBACK}"
         except Exception:
-            response = "I'm having trouble connecting to my AI backend right now. Could you try again in a moment?"
+            response = GENERAL_CHAT_FALLBACK
 
         state["response_type"] = "general"
         state["response_text"] = response
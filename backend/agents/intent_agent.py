@@ -3,15 +3,33 @@ AI Travel Guardian+ — Intent Agent
 Parses user messages into structured travel intent using Groq LLM.
 """
 
+import asyncio
 from agents.state import TravelState
+from agents.intent_parser import parse_intent
 from llm.prompts import INTENT_EXTRACTION_PROMPT
 from utils.helpers import normalize_city, parse_date
 
+LLM_FAILED_QUESTION = "I had trouble understanding your request. Could you tell me your source city, destination, and travel dates?"
+UNPARSED_QUESTION = "Could you please provide more details about your trip? I need at least a destination and travel date."
 
-def intent_agent(state: TravelState, llm_client) -> dict:
-    """Extract travel intent from user message using LLM."""
+
+async def intent_agent(state: TravelState, llm_client, intent_cache=None) -> dict:
+    """Extract travel intent from user message using LLM.
+
+    Simple searches are parsed by rules without the LLM; with a SemanticIntentCache,
+    near-duplicate messages reuse a previously parsed intent.
+    """
     user_message = state.get("user_message", "")
 
+    query = None
+    result = parse_intent(user_message)
+    if result is None and intent_cache:
+        try:
+            query = await asyncio.to_thread(intent_cache.prepare, user_message)
+            result = intent_cache.lookup(query)
+        except Exception:
+            query = None
+
     prompt = INTENT_EXTRACTION_PROMPT.format(user_message=user_message)
     messages = [
         {"role": "system", "content": "You are a travel intent extraction AI. Always respond with valid JSON only."},
@@ -19,23 +37,32 @@ def intent_agent(state: TravelState, llm_client) -> dict:
     ]
 
     try:
-        result = llm_client.chat_json(messages, model=llm_client.fast_model, temperature=0.1)
+        if result is None:
+            result = await llm_client.achat_json(messages, model=llm_client.fast_model, temperature=0.1,
+                                                  tag="intent_extraction")
+            if query is not None and isinstance(result, dict) and "error" not in result:
+                intent_cache.store(query, result)
     except Exception:
-        return {
-            "needs_clarification": True,
-            "clarification_question": "I had trouble understanding your request. Could you tell me your source city, destination, and travel dates?",
-            "response_type": "clarification",
-            "response_text": "I had trouble understanding your request. Could you tell me your source city, destination, and travel dates?",
-        }
+        return clarification_updates(LLM_FAILED_QUESTION)
 
     if isinstance(result, dict) and "error" in result:
-        return {
-            "needs_clarification": True,
-            "clarification_question": "Could you please provide more details about your trip? I need at least a destination and travel date.",
-            "response_type": "clarification",
-            "response_text": "Could you please provide more details about your trip? I need at least a destination and travel date.",
-        }
+        return clarification_updates(UNPARSED_QUESTION)
+
+    return build_intent_updates(state, result)
+
+
+def clarification_updates(question: str) -> dict:
+    """State updates asking the user to clarify their request."""
+    return {
+        "needs_clarification": True,
+        "clarification_question": question,
+        "response_type": "clarification",
+        "response_text": question,
+    }
+
 
+def build_intent_updates(state: TravelState, result: dict) -> dict:
+    """Normalise a parsed intent (cities to IATA, dates to ISO) and merge it over the state."""
     # Normalize cities
     updates = {}
     source_raw = result.get("source")
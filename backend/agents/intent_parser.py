@@ -0,0 +1,138 @@
+"""
+AI Travel Guardian+ — Rule-Based Intent Parser
+Deterministic fast path for simple "X to Y on DATE" searches. Returns the same fields as
+INTENT_EXTRACTION_PROMPT, or None when the message is ambiguous and needs the LLM.
+"""
+
+import re
+from typing import Optional
+
+from utils.helpers import RELATIVE_DATE_PHRASES, find_cities, parse_date
+
+_MONTHS = r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|jun(?:e)?|jul(?:y)?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
+
+_DATE_RES = [
+    re.compile(r"\b\d{4}-\d{2}-\d{2}\b"),
+    re.compile(r"\b\d{1,2}[/-]\d{1,2}[/-]\d{4}\b"),
+    re.compile(rf"\b\d{{1,2}}(?:st|nd|rd|th)?\s+{_MONTHS}(?:,?\s+\d{{4}})?\b"),
+    re.compile(rf"\b{_MONTHS}\s+\d{{1,2}}(?:st|nd|rd|th)?(?:,?\s+\d{{4}})?\b"),
+]
+_ORDINAL_RE = re.compile(r"(\d)(?:st|nd|rd|th)\b")
+_SOURCE_MARKER_RE = re.compile(r"\bfrom\s*$")
+_DESTINATION_MARKER_RE = re.compile(r"(?:\bto|->|→)\s*$")
+_DAYS_RE = re.compile(r"\b(\d{1,2})\s*-?\s*(?:days?|nights?)\b")
+_PASSENGERS_RE = re.compile(r"\b(\d{1,2})\s+(?:people|persons|passengers|adults|travellers|travelers|of us)\b")
+
+# Anything suggesting a question, a change or a constraint the rules don't model goes to the LLM
+_NEEDS_LLM_RE = re.compile(
+    r"\?|\b(?:what|which|why|how|when|where|should|change|instead|not|don't|dont|without|except|"
+    r"return(?:ing)?|round.?trip|via|or|but|after|before|between)\b"
+)
+
+_BUDGET_WORDS = [
+    ("luxury", re.compile(r"\b(?:luxury|luxurious|premium|5[- ]star|five[- ]star)\b")),
+    ("budget", re.compile(r"\b(?:budget|cheap|cheapest|affordable|low[- ]cost|backpack\w*)\b")),
+    ("medium", re.compile(r"\b(?:mid[- ]range|moderate|medium)\b")),
+]
+_PRIORITY_WORDS = [
+    ("low_delay", re.compile(r"\b(?:hate delays?|reliable|on[- ]time|punctual|no delays?)\b")),
+    ("low_price", re.compile(r"\b(?:cheap|cheapest|budget|affordable|low[- ]cost)\b")),
+    ("best_service", re.compile(r"\b(?:comfortable|best service|premium)\b")),
+]
+_TRAVELLER_WORDS = [
+    ("family", re.compile(r"\b(?:family|kids|children|parents)\b")),
+    ("couple", re.compile(r"\b(?:couple|honeymoon|wife|husband|partner|girlfriend|boyfriend)\b")),
+    ("business", re.compile(r"\b(?:business|work|conference|meeting)\b")),
+]
+_DIETARY_WORDS = [
+    ("nonveg", re.compile(r"\bnon[- ]?veg(?:etarian)?\b")),
+    ("veg", re.compile(r"\b(?:veg|vegetarian|vegan|jain)\b")),
+]
+
+
+def _first_match(table, text: str, default: Optional[str]) -> Optional[str]:
+    for value, pattern in table:
+        if pattern.search(text):
+            return value
+    return default
+
+
+def _route(text: str, cities: list) -> Optional[tuple]:
+    """(source, destination) from "from X" / "to Y" markers, else "X ... Y" order."""
+    source = destination = None
+    for pos, code in cities:
+        prefix = text[:pos]
+        if _SOURCE_MARKER_RE.search(prefix):
+            source = source or code
+        elif _DESTINATION_MARKER_RE.search(prefix):
+            destination = destination or code
+    codes = [code for _, code in cities]
+    if source is None and destination is None:
+        source, destination = codes
+    elif source is None:
+        source = next(c for c in codes if c != destination)
+    elif destination is None:
+        destination = next(c for c in codes if c != source)
+    if {source, destination} != set(codes):
+        return None
+    return source, destination
+
+
+def _find_date(text: str) -> Optional[str]:
+    """ISO travel date, or None if there is no date or more than one candidate."""
+    phrases = [p for p in RELATIVE_DATE_PHRASES if p in text]
+    explicit = {m.group(0) for pattern in _DATE_RES for m in pattern.finditer(text)}
+    if len(phrases) + len(explicit) != 1:
+        return None
+    if phrases:
+        return parse_date(phrases[0])
+    # Normalise "15th march, 2025" / "march 15 2025" to formats parse_date accepts
+    parts = _ORDINAL_RE.sub(r"\1", explicit.pop()).replace(",", " ").split()
+    if len(parts) == 3 and not parts[0].isdigit():
+        return parse_date(f"{parts[0]} {parts[1]}, {parts[2]}")
+    return parse_date(" ".join(parts))
+
+
+def parse_intent(message: str) -> Optional[dict]:
+    """Parse a simple flight-search message without the LLM.
+
+    Requires exactly two distinct cities with a consistent direction and exactly one
+    parseable date; returns None otherwise so the caller can fall back to the LLM.
+    Fields the message says nothing about are None so intent_agent keeps the session's values.
+    """
+    if not message or len(message) > 160:
+        return None
+    text = message.lower()
+    if _NEEDS_LLM_RE.search(text):
+        return None
+
+    cities = find_cities(message)
+    codes = [code for _, code in cities]
+    if len(codes) != 2 or codes[0] == codes[1]:
+        return None
+
+    route = _route(text, cities)
+    if route is None:
+        return None
+    source, destination = route
+
+    travel_date = _find_date(text)
+    if not travel_date:
+        return None
+
+    days = _DAYS_RE.search(text)
+    passengers = _PASSENGERS_RE.search(text)
+    return {
+        "source": source,
+        "destination": destination,
+        "travel_date": travel_date,
+        "return_date": None,
+        "num_days": int(days.group(1)) if days else None,
+        "budget": _first_match(_BUDGET_WORDS, text, None),
+        "priority": _first_match(_PRIORITY_WORDS, text, None),
+        "num_passengers": int(passengers.group(1)) if passengers else None,
+        "dietary": _first_match(_DIETARY_WORDS, text, None),
+        "traveller_type": _first_match(_TRAVELLER_WORDS, text, None),
+        "needs_clarification": False,
+        "clarification_question": None,
+    }
@@ -5,12 +5,15 @@ Generates day-wise trip itinerary + food recommendations using city knowledge +
 
 import json
 from pathlib import Path
-from agents.state import TravelState
+from agents.state import TravelState, DEGRADED
 from llm.prompts import ITINERARY_GENERATION_PROMPT
 from utils.helpers import IATA_TO_CITY
 
 
-def itinerary_agent(state: TravelState, llm_client) -> dict:
+INPUT_FIELDS = ("destination", "num_days", "budget", "traveller_type", "dietary")
+
+
+async def itinerary_agent(state: TravelState, llm_client) -> dict:
     """Generate a day-wise itinerary using city knowledge base + LLM."""
     destination_iata = state.get("destination", "")
     destination_city = IATA_TO_CITY.get(destination_iata, destination_iata)
@@ -45,12 +48,15 @@ def itinerary_agent(state: TravelState, llm_client) -> dict:
         {"role": "user", "content": prompt},
     ]
 
+    degraded = False
     try:
-        result = llm_client.chat_json(messages, model=llm_client.smart_model, temperature=0.5, max_tokens=3000)
+        result = await llm_client.achat_json(messages, model=llm_client.smart_model, temperature=0.5, max_tokens=3000,
+                                              tag="itinerary_generation")
     except Exception:
-        result = _fallback_itinerary(destination_city, num_days, city_knowledge)
+        result = None
 
-    if isinstance(result, dict) and "error" in result:
+    if result is None or (isinstance(result, dict) and "error" in result):
+        degraded = True
         result = _fallback_itinerary(destination_city, num_days, city_knowledge)
 
     # Extract food recommendations
@@ -61,10 +67,13 @@ def itinerary_agent(state: TravelState, llm_client) -> dict:
                 meal["day"] = day.get("day", 0)
                 food_recs.append(meal)
 
-    return {
+    updates = {
         "itinerary": result,
         "food_recommendations": food_recs,
     }
+    if degraded:
+        updates[DEGRADED] = True
+    return updates
 
 
 def _fallback_itinerary(city: str, num_days: int, knowledge: dict) -> dict:
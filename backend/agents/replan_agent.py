@@ -1,18 +1,14 @@
 """
-AI Travel Guardian+ — Replan Agent
-Detects user intent to change existing plans and triggers replanning.
+AI Travel Guardian+ — Replan Helpers
+Plan summary and change-detection result handling used by the turn analysis agent.
 """
 
 from agents.state import TravelState
-from llm.prompts import REPLAN_DETECTION_PROMPT
 
 
-def replan_agent(state: TravelState, llm_client) -> dict:
-    """Detect if user wants to modify their trip plan and what changed."""
-    user_message = state.get("user_message", "")
-
-    # Build current plan summary
-    current_plan = (
+def current_plan_summary(state: TravelState) -> str:
+    """One-line summary of the active plan for replan prompts."""
+    return (
         f"Source: {state.get('source', 'N/A')}, "
         f"Destination: {state.get('destination', 'N/A')}, "
         f"Date: {state.get('travel_date', 'N/A')}, "
@@ -22,19 +18,9 @@ def replan_agent(state: TravelState, llm_client) -> dict:
         f"Passengers: {state.get('num_passengers', 1)}"
     )
 
-    prompt = REPLAN_DETECTION_PROMPT.format(
-        user_message=user_message, current_plan=current_plan,
-    )
-    messages = [
-        {"role": "system", "content": "You are a travel plan change detector. Return valid JSON only."},
-        {"role": "user", "content": prompt},
-    ]
-
-    try:
-        result = llm_client.chat_json(messages, model=llm_client.fast_model, temperature=0.1)
-    except Exception:
-        return {"requires_replanning": False, "replan_change_type": "no_change"}
 
+def build_replan_updates(result) -> dict:
+    """State updates for a detected plan change (change type, new values, confirmation)."""
     if isinstance(result, dict) and "error" not in result:
         requires = result.get("requires_replanning", False)
         change_type = result.get("change_type", "no_change")
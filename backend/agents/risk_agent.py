@@ -4,11 +4,14 @@ Generates warnings for risky flights based on rules and LLM analysis.
 """
 
 import json
-from agents.state import TravelState
+from agents.state import TravelState, DEGRADED
 from llm.prompts import RISK_WARNING_PROMPT
 
 
-def risk_agent(state: TravelState, llm_client) -> dict:
+INPUT_FIELDS = ("ranked_flights",)
+
+
+async def risk_agent(state: TravelState, llm_client) -> dict:
     """Generate rule-based + LLM-powered risk warnings for ranked flights."""
     ranked_flights = state.get("ranked_flights", [])
     if not ranked_flights:
@@ -49,6 +52,7 @@ def risk_agent(state: TravelState, llm_client) -> dict:
             })
 
     # ── LLM-based warnings (supplement) ──
+    degraded = True
     try:
         flights_summary = json.dumps([{
             "flight_number": f.get("flight_number"),
@@ -65,9 +69,11 @@ def risk_agent(state: TravelState, llm_client) -> dict:
             {"role": "system", "content": "You are a flight risk analysis AI. Return valid JSON only."},
             {"role": "user", "content": prompt},
         ]
-        llm_warnings = llm_client.chat_json(messages, model=llm_client.fast_model, temperature=0.1)
+        llm_warnings = await llm_client.achat_json(messages, model=llm_client.fast_model, temperature=0.1,
+                                                     tag="risk_warning")
 
         if isinstance(llm_warnings, list):
+            degraded = False
             # Merge, deduplicate
             existing_keys = {(w["flight_number"], w["warning_type"]) for w in warnings}
             for lw in llm_warnings:
@@ -77,4 +83,7 @@ def risk_agent(state: TravelState, llm_client) -> dict:
     except Exception:
         pass  # Rule-based warnings are sufficient
 
-    return {"risk_warnings": warnings}
+    updates = {"risk_warnings": warnings}
+    if degraded:
+        updates[DEGRADED] = True
+    return updates
@@ -5,6 +5,10 @@ TypedDict definition for the multi-agent pipeline state.
 
 from typing import TypedDict, Optional, List, Dict, Any
 
+# Key an agent adds to its updates when it fell back to a degraded (non-LLM) output.
+# The pipeline strips it before merging and never memoises such outputs.
+DEGRADED = "_degraded"
+
 
 class TravelState(TypedDict, total=False):
     """Shared state passed between all agents in the LangGraph pipeline."""
@@ -48,6 +52,9 @@ class TravelState(TypedDict, total=False):
     requires_replanning: bool
     replan_change_type: Optional[str]
 
+    # Per-agent memo: agent name -> {"hash": input hash, "output": last updates}
+    agent_memo: Dict[str, Dict[str, Any]]
+
     # Final output
     response_text: str
     response_type: str  # clarification|flight_results|trip_plan|general|replan
@@ -0,0 +1,40 @@
+"""
+AI Travel Guardian+ — Turn Analysis Agent
+For sessions with an existing trip, extracts intent and detects plan changes in a single LLM call.
+"""
+
+from typing import Tuple
+from agents.state import TravelState
+from agents.intent_agent import LLM_FAILED_QUESTION, UNPARSED_QUESTION, build_intent_updates, clarification_updates
+from agents.replan_agent import build_replan_updates, current_plan_summary
+from llm.prompts import TURN_ANALYSIS_PROMPT
+
+NO_CHANGE = {"requires_replanning": False, "replan_change_type": "no_change"}
+
+
+async def turn_analysis_agent(state: TravelState, llm_client) -> Tuple[dict, dict]:
+    """Return (intent updates, replan updates), to be applied in that order.
+
+    Both come from one LLM call, so the current plan in the prompt is the plan as it stands
+    before this turn's intent updates are applied.
+    """
+    user_message = state.get("user_message", "")
+
+    prompt = TURN_ANALYSIS_PROMPT.format(
+        user_message=user_message, current_plan=current_plan_summary(state),
+    )
+    messages = [
+        {"role": "system", "content": "You are a travel intent extraction and plan change detection AI. Return valid JSON only."},
+        {"role": "user", "content": prompt},
+    ]
+
+    try:
+        result = await llm_client.achat_json(messages, model=llm_client.fast_model, temperature=0.1,
+                                              tag="turn_analysis")
+    except Exception:
+        return clarification_updates(LLM_FAILED_QUESTION), dict(NO_CHANGE)
+
+    if not isinstance(result, dict) or "error" in result or not isinstance(result.get("intent"), dict):
+        return clarification_updates(UNPARSED_QUESTION), dict(NO_CHANGE)
+
+    return build_intent_updates(state, result["intent"]), build_replan_updates(result.get("replan") or {})
@@ -2,15 +2,118 @@
 
 import json
 import uuid
-import asyncio
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
-from database.database import SessionLocal, get_db
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from database.database import ReadSessionLocal, write_session
+from database.conversation_archive import session_history
 from database.models import Conversation, TripPlan
+from database.queries import recent_history
 from database.schemas import ChatMessage, ChatResponse
+from agents.graph import trip_plan_data
+from utils.executors import db_executor
 
 router = APIRouter(prefix="/api/v1/chat", tags=["chat"])
 
 
+def _turn_state(session_id: str, user_message: str, history_list: list,
+                trip_state: dict = None, stored: dict = None, trip_plan_id=None) -> dict:
+    """Pipeline state for one turn: defaults, the trip's columns, the session's stored state
+    (flights, itinerary, agent memo...), then this turn's input."""
+    # A stored state for a different trip plan than the one requested is not reused
+    if stored and trip_plan_id and stored.get("trip_plan_id") not in (None, trip_plan_id):
+        stored = None
+    return {
+        "num_passengers": 1,
+        "dietary": "any",
+        "traveller_type": "solo",
+        "available_flights": [],
+        "ranked_flights": [],
+        "risk_warnings": [],
+        "recommended_hotels": [],
+        "food_recommendations": [],
+        "delay_predictions": [],
+        "shap_explanations": [],
+        **(trip_state or {}),
+        **(stored or {}),
+        "user_message": user_message,
+        "session_id": session_id,
+        "conversation_history": history_list,
+        "needs_clarification": False,
+        "requires_replanning": False,
+        "response_text": "",
+        "response_type": "general",
+    }
+
+
+def _save_message(**fields):
+    """Insert one Conversation row (blocking; run via db_executor)."""
+    with write_session() as db:
+        db.add(Conversation(**fields))
+
+
+def _load_context(session_id: str, trip_plan_id=None) -> tuple:
+    """Recent history and the stored trip plan's fields (blocking; run via db_executor)."""
+    db = ReadSessionLocal()
+    try:
+        history_list = recent_history(db, session_id)
+        trip_state = {}
+        if trip_plan_id:
+            trip = db.query(TripPlan).filter(TripPlan.id == trip_plan_id).first()
+            if trip:
+                trip_state = {
+                    "source": trip.source, "destination": trip.destination,
+                    "travel_date": trip.travel_date, "num_days": trip.num_days,
+                    "budget": trip.budget, "priority": trip.priority,
+                    "num_passengers": trip.num_passengers or 1,
+                }
+        return history_list, trip_state
+    finally:
+        db.close()
+
+
+def _load_history(session_id: str) -> list:
+    """Full transcript including archived turns (blocking; run via db_executor)."""
+    db = ReadSessionLocal()
+    try:
+        return session_history(db, session_id)
+    finally:
+        db.close()
+
+
+def _save_trip(session_id: str, trip_plan_id, result: dict):
+    """Update the session's trip plan, or create one, from a pipeline result; returns its id."""
+    saved_trip_id = trip_plan_id
+    with write_session() as db:
+        if trip_plan_id:
+            trip = db.query(TripPlan).filter(TripPlan.id == trip_plan_id).first()
+            if trip:
+                trip.itinerary_json = json.dumps(result.get("itinerary")) if result.get("itinerary") else trip.itinerary_json
+                trip.food_json = json.dumps(result.get("food_recommendations")) if result.get("food_recommendations") else trip.food_json
+                trip.num_days = result.get("num_days") or trip.num_days
+                trip.budget = result.get("budget") or trip.budget
+                saved_trip_id = trip.id
+        else:
+            rec_flight = result.get("recommended_flight", {})
+            rec_hotel = result.get("recommended_hotels", [{}])
+            trip = TripPlan(
+                session_id=session_id,
+                source=result.get("source", ""),
+                destination=result.get("destination", ""),
+                travel_date=result.get("travel_date", "TBD"),
+                num_days=result.get("num_days"),
+                budget=result.get("budget", "medium"),
+                priority=result.get("priority", "balanced"),
+                num_passengers=result.get("num_passengers", 1),
+                selected_flight_id=rec_flight.get("id"),
+                selected_hotel_id=rec_hotel[0].get("id") if rec_hotel else None,
+                itinerary_json=json.dumps(result.get("itinerary")) if result.get("itinerary") else None,
+                food_json=json.dumps(result.get("food_recommendations")) if result.get("food_recommendations") else None,
+            )
+            db.add(trip)
+            db.flush()
+            saved_trip_id = trip.id
+    return saved_trip_id
+
+
 @router.websocket("/ws/{session_id}")
 async def websocket_chat(websocket: WebSocket, session_id: str):
     """WebSocket endpoint for real-time chat."""
@@ -26,160 +129,85 @@ async def websocket_chat(websocket: WebSocket, session_id: str):
                 await websocket.send_json({"type": "error", "content": "Empty message"})
                 continue
 
-            # Save user message
-            db = SessionLocal()
-            try:
-                conv = Conversation(
-                    session_id=session_id, role="user",
-                    content=user_message, message_type="text",
-                    trip_plan_id=trip_plan_id,
-                )
-                db.add(conv)
-                db.commit()
-
-                # Get conversation history
-                history = db.query(Conversation).filter(
-                    Conversation.session_id == session_id
-                ).order_by(Conversation.created_at.desc()).limit(10).all()
-                history_list = [{"role": h.role, "content": h.content} for h in reversed(history)]
-
-                # Load existing trip plan state if any
-                trip_state = {}
-                if trip_plan_id:
-                    trip = db.query(TripPlan).filter(TripPlan.id == trip_plan_id).first()
-                    if trip:
-                        trip_state = {
-                            "source": trip.source, "destination": trip.destination,
-                            "travel_date": trip.travel_date, "num_days": trip.num_days,
-                            "budget": trip.budget, "priority": trip.priority,
-                            "num_passengers": trip.num_passengers or 1,
-                        }
-            finally:
-                db.close()
+            # Save user message, then load history and the existing trip plan (off the event loop)
+            await db_executor.run(
+                _save_message, session_id=session_id, role="user",
+                content=user_message, message_type="text", trip_plan_id=trip_plan_id,
+            )
+            history_list, trip_state = await db_executor.run(_load_context, session_id, trip_plan_id)
 
             # Run agent pipeline
-            from main import agent_pipeline
+            from main import agent_pipeline, session_store
             if not agent_pipeline:
                 await websocket.send_json({"type": "chunk", "content": "System is initializing. Please try again in a moment."})
                 await websocket.send_json({"type": "done", "full_response": "System is initializing."})
                 continue
 
-            await websocket.send_json({"type": "chunk", "content": "Analysing your request..."})
-
-            state = {
-                "user_message": user_message,
-                "session_id": session_id,
-                "conversation_history": history_list,
-                "num_passengers": 1,
-                "dietary": "any",
-                "traveller_type": "solo",
-                "needs_clarification": False,
-                "available_flights": [],
-                "ranked_flights": [],
-                "risk_warnings": [],
-                "recommended_hotels": [],
-                "food_recommendations": [],
-                "delay_predictions": [],
-                "shap_explanations": [],
-                "requires_replanning": False,
-                "response_text": "",
-                "response_type": "general",
-                **trip_state,
-            }
-
-            result = await asyncio.to_thread(agent_pipeline.run, state)
-
-            # Stream response text
+            await websocket.send_json({"type": "status", "content": "Analysing your request..."})
+
+            stored = await db_executor.run(session_store.load, session_id) if session_store else None
+            state = _turn_state(session_id, user_message, history_list, trip_state, stored, trip_plan_id)
+
+            # Forward pipeline events (streamed tokens, per-agent results) as they happen
+            streamed = []
+            sent_types = set()
+
+            async def emit(event: dict):
+                if event["type"] == "chunk":
+                    streamed.append(event["content"])
+                sent_types.add(event["type"])
+                await websocket.send_json(event)
+
+            result = await agent_pipeline.arun(state, emit=emit)
+
+            # Send whatever part of the reply was not streamed (e.g. the composed trip summary)
             response_text = result.get("response_text", "")
-            chunk_size = 50
-            for i in range(0, len(response_text), chunk_size):
-                await websocket.send_json({
-                    "type": "chunk",
-                    "content": response_text[i:i + chunk_size],
-                })
+            already_sent = "".join(streamed)
+            if response_text.startswith(already_sent):
+                remainder = response_text[len(already_sent):]
+                chunk_size = 50
+                for i in range(0, len(remainder), chunk_size):
+                    await websocket.send_json({
+                        "type": "chunk",
+                        "content": remainder[i:i + chunk_size],
+                    })
 
-            # Send structured data
-            if result.get("ranked_flights"):
+            # Send structured data not already pushed by the pipeline
+            if result.get("ranked_flights") and "flight_results" not in sent_types:
                 await websocket.send_json({
                     "type": "flight_results",
                     "data": result["ranked_flights"][:5],
                 })
 
-            if result.get("risk_warnings"):
+            if result.get("risk_warnings") and "risk_warnings" not in sent_types:
                 await websocket.send_json({
                     "type": "risk_warnings",
                     "data": result["risk_warnings"],
                 })
 
-            if result.get("itinerary") or result.get("recommended_hotels"):
-                trip_data = {
-                    "source": result.get("source"),
-                    "destination": result.get("destination"),
-                    "travel_date": result.get("travel_date"),
-                    "num_days": result.get("num_days"),
-                    "budget": result.get("budget"),
-                    "recommended_flight": result.get("recommended_flight"),
-                    "recommended_hotels": result.get("recommended_hotels", []),
-                    "itinerary": result.get("itinerary"),
-                    "food_recommendations": result.get("food_recommendations", []),
-                }
-                await websocket.send_json({"type": "trip_plan", "data": trip_data})
+            if (result.get("itinerary") or result.get("recommended_hotels")) and "trip_plan" not in sent_types:
+                await websocket.send_json({"type": "trip_plan", "data": trip_plan_data(result)})
 
             # Save trip plan
             saved_trip_id = trip_plan_id
             if result.get("response_type") in ("trip_plan", "replan") and result.get("destination"):
-                db = SessionLocal()
-                try:
-                    if trip_plan_id:
-                        trip = db.query(TripPlan).filter(TripPlan.id == trip_plan_id).first()
-                        if trip:
-                            trip.itinerary_json = json.dumps(result.get("itinerary")) if result.get("itinerary") else trip.itinerary_json
-                            trip.food_json = json.dumps(result.get("food_recommendations")) if result.get("food_recommendations") else trip.food_json
-                            trip.num_days = result.get("num_days") or trip.num_days
-                            trip.budget = result.get("budget") or trip.budget
-                            db.commit()
-                            saved_trip_id = trip.id
-                    else:
-                        rec_flight = result.get("recommended_flight", {})
-                        rec_hotel = result.get("recommended_hotels", [{}])
-                        trip = TripPlan(
-                            session_id=session_id,
-                            source=result.get("source", ""),
-                            destination=result.get("destination", ""),
-                            travel_date=result.get("travel_date", "TBD"),
-                            num_days=result.get("num_days"),
-                            budget=result.get("budget", "medium"),
-                            priority=result.get("priority", "balanced"),
-                            num_passengers=result.get("num_passengers", 1),
-                            selected_flight_id=rec_flight.get("id"),
-                            selected_hotel_id=rec_hotel[0].get("id") if rec_hotel else None,
-                            itinerary_json=json.dumps(result.get("itinerary")) if result.get("itinerary") else None,
-                            food_json=json.dumps(result.get("food_recommendations")) if result.get("food_recommendations") else None,
-                        )
-                        db.add(trip)
-                        db.commit()
-                        db.refresh(trip)
-                        saved_trip_id = trip.id
-                finally:
-                    db.close()
+                saved_trip_id = await db_executor.run(_save_trip, session_id, trip_plan_id, result)
 
             # Save assistant message
-            db = SessionLocal()
-            try:
-                conv = Conversation(
-                    session_id=session_id, role="assistant",
-                    content=response_text,
-                    message_type=result.get("response_type", "text"),
-                    trip_plan_id=saved_trip_id,
-                    metadata_json=json.dumps({
-                        "flight_count": len(result.get("ranked_flights", [])),
-                        "warning_count": len(result.get("risk_warnings", [])),
-                    }),
-                )
-                db.add(conv)
-                db.commit()
-            finally:
-                db.close()
+            await db_executor.run(
+                _save_message, session_id=session_id, role="assistant",
+                content=response_text,
+                message_type=result.get("response_type", "text"),
+                trip_plan_id=saved_trip_id,
+                metadata_json=json.dumps({
+                    "flight_count": len(result.get("ranked_flights", [])),
+                    "warning_count": len(result.get("risk_warnings", [])),
+                }),
+            )
+
+            if session_store:
+                result["trip_plan_id"] = saved_trip_id
+                session_store.save(session_id, result)
 
             await websocket.send_json({
                 "type": "done",
@@ -198,9 +226,9 @@ async def websocket_chat(websocket: WebSocket, session_id: str):
 
 
 @router.post("/message", response_model=ChatResponse)
-async def chat_message(msg: ChatMessage, db=Depends(get_db)):
+async def chat_message(msg: ChatMessage):
     """Non-streaming REST chat endpoint (fallback)."""
-    from main import agent_pipeline
+    from main import agent_pipeline, session_store
 
     if not agent_pipeline:
         return ChatResponse(
@@ -208,42 +236,26 @@ async def chat_message(msg: ChatMessage, db=Depends(get_db)):
             response_type="general",
         )
 
-    # Get history
-    history = db.query(Conversation).filter(
-        Conversation.session_id == msg.session_id
-    ).order_by(Conversation.created_at.desc()).limit(10).all()
-    history_list = [{"role": h.role, "content": h.content} for h in reversed(history)]
-
-    # Save user message
-    db.add(Conversation(
-        session_id=msg.session_id, role="user",
-        content=msg.message, message_type="text",
-        trip_plan_id=msg.trip_plan_id,
-    ))
-    db.commit()
-
-    state = {
-        "user_message": msg.message,
-        "session_id": msg.session_id,
-        "conversation_history": history_list,
-        "num_passengers": 1, "dietary": "any", "traveller_type": "solo",
-        "needs_clarification": False,
-        "available_flights": [], "ranked_flights": [],
-        "risk_warnings": [], "recommended_hotels": [],
-        "food_recommendations": [], "delay_predictions": [],
-        "shap_explanations": [], "requires_replanning": False,
-        "response_text": "", "response_type": "general",
-    }
+    # Get history, then save the user message (off the event loop)
+    history_list, _ = await db_executor.run(_load_context, msg.session_id)
+    await db_executor.run(
+        _save_message, session_id=msg.session_id, role="user",
+        content=msg.message, message_type="text", trip_plan_id=msg.trip_plan_id,
+    )
 
-    result = agent_pipeline.run(state)
+    stored = await db_executor.run(session_store.load, msg.session_id) if session_store else None
+    state = _turn_state(msg.session_id, msg.message, history_list, stored=stored, trip_plan_id=msg.trip_plan_id)
+
+    result = await agent_pipeline.arun(state)
+    if session_store:
+        session_store.save(msg.session_id, result)
 
     # Save assistant message
-    db.add(Conversation(
-        session_id=msg.session_id, role="assistant",
+    await db_executor.run(
+        _save_message, session_id=msg.session_id, role="assistant",
         content=result.get("response_text", ""),
         message_type=result.get("response_type", "text"),
-    ))
-    db.commit()
+    )
 
     return ChatResponse(
         response_text=result.get("response_text", ""),
@@ -252,3 +264,10 @@ async def chat_message(msg: ChatMessage, db=Depends(get_db)):
         risk_warnings=result.get("risk_warnings"),
         itinerary=result.get("itinerary"),
     )
+
+
+@router.get("/history/{session_id}")
+async def get_history(session_id: str):
+    """Full conversation history of a session, including compacted turns."""
+    messages = await db_executor.run(_load_history, session_id)
+    return {"session_id": session_id, "messages": messages}
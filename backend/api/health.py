@@ -1,16 +1,39 @@
 """AI Travel Guardian+ — Health Check API"""
+from typing import Optional
 from fastapi import APIRouter
+from utils.executors import executors_info
 
 router = APIRouter(prefix="/api/v1", tags=["health"])
 
 
+def _training_progress(progress) -> Optional[dict]:
+    """Snapshot of background training progress (a Manager proxy while training runs)."""
+    if progress is None:
+        return None
+    try:
+        snapshot = dict(progress)
+    except Exception:
+        return None
+    total = snapshot.get("total_rounds")
+    if total:
+        snapshot["percent"] = round(100 * snapshot.get("round", 0) / total, 1)
+    return snapshot
+
+
 @router.get("/health")
 async def health_check():
     """System health check endpoint."""
-    from main import app_state
+    from main import app_state, delay_predictor, agent_pipeline, session_store
     return {
         "status": "ok",
         "model_loaded": app_state.get("model_loaded", False),
+        "model_status": app_state.get("model_status", "unknown"),
+        "training": _training_progress(app_state.get("training_progress")),
+        "prediction_cache": delay_predictor.cache_info() if delay_predictor else None,
+        "llm_cache": agent_pipeline.llm.cache_info() if agent_pipeline else None,
+        "intent_cache": agent_pipeline.intent_cache.info() if agent_pipeline and agent_pipeline.intent_cache else None,
+        "session_store": session_store.info() if session_store else None,
+        "executors": executors_info(),
         "db": "connected",
         "groq": app_state.get("groq_status", "unknown"),
         "faiss": app_state.get("faiss_status", "unknown"),
@@ -22,11 +22,38 @@ class Settings(BaseSettings):
     GROQ_SMART_MODEL: str = "llama-3.3-70b-versatile"
     GROQ_MAX_RETRIES: int = 3
     GROQ_RETRY_DELAY: int = 2
+    GROQ_MAX_CONNECTIONS: int = 100
+    GROQ_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_CACHE_SIZE: int = 1024  # 0 disables the LLM response cache
+    LLM_CACHE_TTL: int = 86400  # seconds
+    LLM_CACHE_PATH: str = ""  # SQLite file for a persistent cache; empty = memory only
+    INTENT_CACHE_SIZE: int = 2000  # 0 disables the semantic intent cache
+    INTENT_CACHE_THRESHOLD: float = 0.92  # minimum cosine similarity for reuse
+    SESSION_CACHE_SIZE: int = 1024
+    SESSION_STATE_TTL: int = 86400  # seconds a chat session's pipeline state is kept
+    SESSION_FLUSH_INTERVAL: float = 2.0  # seconds between write-behind flushes
+    CONVERSATION_RETENTION_DAYS: int = 30  # turns older than this are archived
+    CONVERSATION_KEEP_RECENT: int = 50  # newest turns per session never archived
+    CONVERSATION_COMPACT_INTERVAL: int = 3600  # seconds between compaction runs; 0 disables
 
     # Database
-    DATABASE_URL: str = "sqlite:///./data/travel_guardian.db"
+    DATABASE_URL: str = "sqlite:///./data/travel_guardian.db"  # relative to the project root; or postgresql://...
+    DB_POOL_SIZE: int = 8
+    DB_MAX_OVERFLOW: int = 8
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a pooled (or the writer) connection
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MiB
+    SQLITE_CACHE_SIZE_KB: int = 65536  # page cache per connection
     SQLITE_DB_PATH: str = "./data/travel_guardian.db"
 
+    # Agent pipeline
+    AGENT_MAX_WORKERS: int = 8  # thread pool for sync agents; the read-only DB pool matches it
+
+    # Bounded executors for blocking work in async handlers (utils/executors.py)
+    DB_EXECUTOR_WORKERS: int = 8
+    CRYPTO_EXECUTOR_WORKERS: int = 4  # bcrypt hash/verify
+    ML_EXECUTOR_WORKERS: int = 2  # delay-model inference outside the agent pipeline
+
     # Security
     JWT_SECRET_KEY: str = "your-super-secret-key-change-in-production"
     JWT_ALGORITHM: str = "HS256"
@@ -43,6 +70,9 @@ class Settings(BaseSettings):
     FAISS_FLIGHTS_PATH: str = "./data/faiss/flights"
     FAISS_HOTELS_PATH: str = "./data/faiss/hotels"
     FAISS_CITY_PATH: str = "./data/faiss/city"
+    PREDICTION_CACHE_SIZE: int = 4096
+    SHAP_BACKEND: str = "booster"  # booster (XGBoost pred_contribs) | shap
+    DELAY_MODEL_BACKEND: str = "xgboost"  # xgboost | compiled (flattened NumPy trees)
 
     @property
     def cors_origins_list(self) -> list[str]:
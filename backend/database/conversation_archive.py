@@ -0,0 +1,113 @@
+"""
+AI Travel Guardian+ — Conversation Compaction
+Moves old chat turns out of the conversations table into one zlib-compressed blob per
+session and batch, keeping each session's most recent turns live for history loads.
+Each session's turns are claimed inside its write transaction (FOR UPDATE SKIP LOCKED on
+PostgreSQL, the database write lock on SQLite), so nodes compacting concurrently never
+archive the same turns twice.
+"""
+
+import json
+import zlib
+from datetime import datetime, timedelta
+from typing import Iterator, List
+
+from sqlalchemy import delete, insert, select
+
+from database.database import ReadSessionLocal, write_session
+from database.models import Conversation, ConversationArchive
+from utils.logger import logger
+
+_TURN_COLUMNS = (
+    Conversation.id, Conversation.trip_plan_id, Conversation.role, Conversation.content,
+    Conversation.message_type, Conversation.metadata_json, Conversation.created_at,
+)
+
+
+def compact_conversations(older_than_days: int = 30, keep_recent: int = 50) -> int:
+    """Archive turns older than ``older_than_days``, keeping each session's newest
+    ``keep_recent`` turns in place. Returns the number of turns archived."""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    archived = 0
+
+    db = ReadSessionLocal()
+    try:
+        sessions = db.execute(
+            select(Conversation.session_id).where(Conversation.created_at < cutoff).distinct()
+        ).scalars().all()
+    finally:
+        db.close()
+
+    for session_id in sessions:
+        recent_ids = (
+            select(Conversation.id)
+            .where(Conversation.session_id == session_id)
+            .order_by(Conversation.created_at.desc())
+            .limit(keep_recent)
+            .scalar_subquery()
+        )
+        try:
+            with write_session() as writer:
+                # Claim the rows: turns another node has locked (or already deleted) are skipped
+                rows = writer.execute(
+                    select(*_TURN_COLUMNS)
+                    .where(
+                        Conversation.session_id == session_id,
+                        Conversation.created_at < cutoff,
+                        Conversation.id.not_in(recent_ids),
+                    )
+                    .order_by(Conversation.created_at)
+                    .with_for_update(skip_locked=True)
+                ).all()
+                if not rows:
+                    continue
+
+                turns = [{
+                    "trip_plan_id": r.trip_plan_id, "role": r.role, "content": r.content,
+                    "message_type": r.message_type, "metadata_json": r.metadata_json,
+                    "created_at": r.created_at.isoformat() if r.created_at else None,
+                } for r in rows]
+                blob = zlib.compress(json.dumps(turns, separators=(",", ":")).encode("utf-8"))
+                writer.execute(insert(ConversationArchive).values(
+                    session_id=session_id, turns_blob=blob, turn_count=len(turns),
+                    first_at=rows[0].created_at, last_at=rows[-1].created_at,
+                    created_at=datetime.utcnow(),
+                ))
+                writer.execute(delete(Conversation).where(Conversation.id.in_([r.id for r in rows])))
+        except Exception as e:
+            logger.warning(f"[WARN] Conversation compaction failed for session {session_id}: {e}")
+            continue
+        archived += len(turns)
+
+    if archived:
+        logger.info(f"[OK] Archived {archived} conversation turns from {len(sessions)} sessions")
+    return archived
+
+
+def archived_turns(db, session_id: str) -> Iterator[dict]:
+    """Yield a session's archived turns oldest first, decompressing one blob at a time."""
+    blobs = db.execute(
+        select(ConversationArchive.turns_blob)
+        .where(ConversationArchive.session_id == session_id)
+        .order_by(ConversationArchive.first_at)
+    ).scalars()
+    for blob in blobs:
+        yield from json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def session_history(db, session_id: str) -> List[dict]:
+    """A session's full transcript oldest first: archived turns, then the live ones."""
+    turns = [{
+        "role": t["role"], "content": t["content"],
+        "message_type": t["message_type"], "created_at": t["created_at"],
+    } for t in archived_turns(db, session_id)]
+    rows = db.execute(
+        select(Conversation.role, Conversation.content, Conversation.message_type, Conversation.created_at)
+        .where(Conversation.session_id == session_id)
+        .order_by(Conversation.created_at)
+    ).all()
+    turns.extend({
+        "role": r.role, "content": r.content, "message_type": r.message_type,
+        "created_at": r.created_at.isoformat() if r.created_at else None,
+    } for r in rows)
+    return turns
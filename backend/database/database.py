@@ -1,37 +1,132 @@
 """
 AI Travel Guardian+ — Database connection and session management.
-Uses SQLAlchemy with SQLite backend.
+Uses SQLAlchemy with the backend named by settings.DATABASE_URL (SQLite or PostgreSQL):
+a pooled read/write engine, a read-only engine for query-only agents, a write engine for
+chat and trip writes (a single serialized writer on SQLite), and an async engine for the
+async API routes.
 """
 
-import os
 from pathlib import Path
+from contextlib import contextmanager
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
-# Resolve database path relative to backend directory
+from config import settings
+
+# Relative SQLite paths are resolved against the project root (where data/ lives),
+# not the process working directory
 BACKEND_DIR = Path(__file__).resolve().parent.parent
-DATA_DIR = BACKEND_DIR.parent / "data"
-DATA_DIR.mkdir(parents=True, exist_ok=True)
+PROJECT_DIR = BACKEND_DIR.parent
+
+
+def resolve_database_url(raw_url: str) -> URL:
+    """Parse DATABASE_URL: absolute SQLite paths, psycopg (v3) as the PostgreSQL driver."""
+    url = make_url(raw_url)
+    backend = url.get_backend_name()
+    if backend == "sqlite" and url.database and url.database != ":memory:":
+        path = Path(url.database)
+        if not path.is_absolute():
+            path = (PROJECT_DIR / path).resolve()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        url = url.set(drivername="sqlite", database=str(path))
+    elif backend == "postgresql":
+        url = url.set(drivername="postgresql+psycopg")
+    return url
+
+
+DATABASE_URL = resolve_database_url(settings.DATABASE_URL)
+IS_SQLITE = DATABASE_URL.get_backend_name() == "sqlite"
+ASYNC_DATABASE_URL = DATABASE_URL.set(drivername="sqlite+aiosqlite") if IS_SQLITE else DATABASE_URL
+
+
+def _engine_args(pool_size: int, max_overflow: int) -> dict:
+    args = {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "echo": False,
+    }
+    if IS_SQLITE:
+        args["connect_args"] = {"check_same_thread": False, "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000}
+    else:
+        # Connections to a shared server can be dropped underneath the pool
+        args["pool_pre_ping"] = True
+    return args
+
 
-DB_PATH = DATA_DIR / "travel_guardian.db"
-DATABASE_URL = f"sqlite:///{DB_PATH}"
+def _create_engine(pool_size: int, max_overflow: int):
+    return create_engine(DATABASE_URL, poolclass=QueuePool, **_engine_args(pool_size, max_overflow))
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    echo=False,
-)
 
-# Enable WAL mode and foreign keys for SQLite
-@event.listens_for(engine, "connect")
 def set_sqlite_pragma(dbapi_connection, connection_record):
+    """WAL, foreign keys and the tuning profile for every new connection."""
     cursor = dbapi_connection.cursor()
     cursor.execute("PRAGMA journal_mode=WAL")
     cursor.execute("PRAGMA foreign_keys=ON")
+    # Safe under WAL (no corruption on power loss, only the last commits may roll back)
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")  # negative = KiB
+    cursor.execute("PRAGMA temp_store=MEMORY")
     cursor.close()
 
 
+def set_read_only_pragma(dbapi_connection, connection_record):
+    set_sqlite_pragma(dbapi_connection, connection_record)
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+
+def set_writer_pragma(dbapi_connection, connection_record):
+    set_sqlite_pragma(dbapi_connection, connection_record)
+    # Let SQLAlchemy, not pysqlite, emit BEGIN
+    dbapi_connection.isolation_level = None
+
+
+def begin_immediate(conn):
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+# Read/write engine (API dependencies, seeding, background jobs)
+engine = _create_engine(settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
+
+# Async engine for the async API routes (aiosqlite / psycopg async). On SQLite its writes
+# (trip and auth routes) do not go through the single writer connection below: they are short
+# deferred transactions that wait up to busy_timeout for the write lock, and may still fail with
+# "database is locked" if a transaction that already read has to upgrade to a write under load.
+# Longer or multi-statement writes belong in write_session(). The pool class is explicit because
+# aiosqlite defaults to NullPool for file databases, which rejects the pool sizing arguments
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=AsyncAdaptedQueuePool,
+                                   **_engine_args(settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW))
+
+if IS_SQLITE:
+    event.listen(engine, "connect", set_sqlite_pragma)
+    event.listen(async_engine.sync_engine, "connect", set_sqlite_pragma)
+
+    # Read-only engine for query-only agents; sized so every agent worker thread gets a connection
+    read_engine = _create_engine(max(settings.DB_POOL_SIZE, settings.AGENT_MAX_WORKERS), settings.DB_MAX_OVERFLOW)
+    event.listen(read_engine, "connect", set_read_only_pragma)
+
+    # Single writer connection; transactions take the write lock up front with BEGIN IMMEDIATE
+    # so concurrent writers queue on the pool instead of failing with "database is locked"
+    write_engine = _create_engine(pool_size=1, max_overflow=0)
+    event.listen(write_engine, "connect", set_writer_pragma)
+    event.listen(write_engine, "begin", begin_immediate)
+else:
+    # PostgreSQL handles concurrent writers itself; reads share the pool as read-only transactions
+    read_engine = engine.execution_options(postgresql_readonly=True)
+    write_engine = engine
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+WriteSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=write_engine)
 Base = declarative_base()
 
 
@@ -44,13 +139,37 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """FastAPI dependency that yields an async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+@contextmanager
+def write_session():
+    """Serialized write transaction: commits on success, rolls back on error."""
+    db = WriteSessionLocal()
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
 def init_db():
     """Create all tables if they don't exist."""
     from database.models import (
         User, Flight, DelayPrediction, Hotel,
-        TripPlan, Conversation, AirlineReview
+        TripPlan, Conversation, ConversationArchive, AirlineReview, SessionState
     )
     Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, so add indexes introduced since
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
 
 
 def get_table_count(table_name: str) -> int:
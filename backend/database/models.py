@@ -1,12 +1,12 @@
 """
 AI Travel Guardian+ — SQLAlchemy ORM Models
-All 7 database tables for the application.
+All database tables for the application.
 """
 
 from datetime import datetime
 from sqlalchemy import (
     Column, Integer, String, Text, Float, DateTime,
-    ForeignKey, Boolean
+    ForeignKey, Boolean, Index, LargeBinary
 )
 from database.database import Base
 
@@ -24,6 +24,10 @@ class User(Base):
 
 class Flight(Base):
     __tablename__ = "flights"
+    __table_args__ = (
+        # Covers route search and its per-flight_number dedup (see database.queries)
+        Index("ix_flights_route", "source", "destination", "flight_number"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     flight_number = Column(String(20), nullable=False)
@@ -46,12 +50,17 @@ class Flight(Base):
 
 class DelayPrediction(Base):
     __tablename__ = "delay_predictions"
+    __table_args__ = (
+        Index("ix_delay_predictions_flight_version", "flight_id", "model_version", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     flight_id = Column(Integer, ForeignKey("flights.id"))
+    model_version = Column(String(64), nullable=False)
     prediction_date = Column(String(20), nullable=False)
     delay_prob = Column(Float, nullable=False)
     delay_risk_score = Column(Float, nullable=False)
+    risk_level = Column(String(20))
     shap_json = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -74,6 +83,10 @@ class Hotel(Base):
     safety_score = Column(Float)
 
 
+# Serves hotel search: city + tier lookup already in ranking order (see database.queries.city_hotels)
+Index("ix_hotels_search", Hotel.city, Hotel.budget_tier, Hotel.safety_score.desc(), Hotel.rating.desc())
+
+
 class TripPlan(Base):
     __tablename__ = "trip_plans"
 
@@ -100,6 +113,9 @@ class TripPlan(Base):
 
 class Conversation(Base):
     __tablename__ = "conversations"
+    __table_args__ = (
+        Index("ix_conversations_session_created", "session_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     session_id = Column(String(100), nullable=False)
@@ -111,6 +127,18 @@ class Conversation(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class ConversationArchive(Base):
+    __tablename__ = "conversation_archives"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    session_id = Column(String(100), nullable=False, index=True)
+    turns_blob = Column(LargeBinary, nullable=False)  # zlib-compressed JSON list of turns
+    turn_count = Column(Integer, nullable=False)
+    first_at = Column(DateTime)
+    last_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
 class AirlineReview(Base):
     __tablename__ = "airline_reviews"
 
@@ -125,3 +153,11 @@ class AirlineReview(Base):
     food_score = Column(Float)
     sentiment_label = Column(String(20))
     source = Column(String(50), default="kaggle")
+
+
+class SessionState(Base):
+    __tablename__ = "session_states"
+
+    session_id = Column(String(100), primary_key=True)
+    state_blob = Column(LargeBinary, nullable=False)  # zlib-compressed JSON TravelState
+    updated_at = Column(DateTime, default=datetime.utcnow, index=True)
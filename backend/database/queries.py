@@ -0,0 +1,119 @@
+"""
+AI Travel Guardian+ — Shared Queries
+Column-projected Core selects for the hot read paths, returning plain dicts instead of
+hydrated ORM objects. Agents and API routes share these so row mapping and defaults agree.
+"""
+
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, exists, func, select
+from sqlalchemy.orm import Session, aliased
+
+from database.models import Conversation, Flight, Hotel
+
+FLIGHT_COLUMNS = (
+    Flight.id, Flight.flight_number, Flight.airline, Flight.source, Flight.destination,
+    Flight.departure_time, Flight.arrival_time, Flight.duration_mins, Flight.price,
+    Flight.aircraft_type, Flight.stops, Flight.day_of_week, Flight.month,
+    Flight.historical_delay_rate, Flight.historical_ontime_rate,
+    Flight.airline_sentiment_score, Flight.congestion_index,
+)
+
+# Revision of the row -> model-input mapping. Bump it whenever FLIGHT_DEFAULTS or the
+# mapping changes: stored delay predictions are keyed by model version *and* this revision,
+# so the next startup recomputes them instead of serving scores built from old inputs.
+# 2: defaults apply only to NULL columns (a real 0 / 0.0 is no longer replaced).
+FEATURE_REVISION = 2
+
+# Substituted for NULL columns (delay model inputs and ranking signals)
+FLIGHT_DEFAULTS = {
+    "day_of_week": 3,
+    "month": 6,
+    "historical_delay_rate": 0.15,
+    "historical_ontime_rate": 0.85,
+    "airline_sentiment_score": 0.7,
+    "congestion_index": 0.5,
+}
+
+HOTEL_COLUMNS = (
+    Hotel.id, Hotel.name, Hotel.city, Hotel.address, Hotel.price_per_night,
+    Hotel.budget_tier, Hotel.rating, Hotel.review_count, Hotel.distance_centre_km,
+    Hotel.amenities, Hotel.safety_score,
+)
+
+
+def row_to_dict(row, defaults: Optional[Dict] = None) -> dict:
+    """Result row -> dict, filling NULL columns from ``defaults``."""
+    data = dict(row._mapping)
+    for key, value in (defaults or {}).items():
+        if data.get(key) is None:
+            data[key] = value
+    return data
+
+
+def flight_to_dict(row) -> dict:
+    """FLIGHT_COLUMNS row -> dict with FLIGHT_DEFAULTS applied."""
+    return row_to_dict(row, FLIGHT_DEFAULTS)
+
+
+def route_schedules(db: Session, source: str, destination: str,
+                    max_stops: Optional[int] = None, limit: Optional[int] = None) -> List[dict]:
+    """Unique schedules on a route: the first row per flight_number, in id order.
+
+    Seeded flights repeat each schedule for several weekdays and months. The MIN(id)
+    subquery is answered from ix_flights_route alone, so only the surviving rows are
+    read from the table.
+    """
+    first_ids = (
+        select(func.min(Flight.id))
+        .where(Flight.source == source, Flight.destination == destination)
+        .group_by(Flight.flight_number)
+        .scalar_subquery()
+    )
+    stmt = select(*FLIGHT_COLUMNS).where(Flight.id.in_(first_ids))
+    if max_stops is not None:
+        stmt = stmt.where(Flight.stops <= max_stops)
+    stmt = stmt.order_by(Flight.id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return [flight_to_dict(row) for row in db.execute(stmt)]
+
+
+def flight_by_id(db: Session, flight_id: int) -> Optional[dict]:
+    """A single flight by id, or None."""
+    row = db.execute(select(*FLIGHT_COLUMNS).where(Flight.id == flight_id)).first()
+    return flight_to_dict(row) if row else None
+
+
+def city_hotels(db: Session, city: str, tiers: List[str], limit: int = 6) -> List[dict]:
+    """Hotels in a city for the given budget tiers, safest and best rated first.
+
+    When the city has no hotel in those tiers, falls back to any hotel there by rating.
+    Both cases are one statement: the NOT EXISTS probe and the tier filter are served by
+    ix_hotels_search, and the fallback rows have a NULL safety sort key.
+    """
+    in_tiers = Hotel.budget_tier.in_(tiers)
+    # Aliased so the probe is not correlated to the outer hotels row
+    probe = aliased(Hotel)
+    tier_match = exists().where(probe.city == city, probe.budget_tier.in_(tiers))
+    stmt = (
+        select(*HOTEL_COLUMNS)
+        .where(Hotel.city == city, in_tiers | ~tier_match)
+        .order_by(case((in_tiers, Hotel.safety_score)).desc(), Hotel.rating.desc())
+        .limit(limit)
+    )
+    return [row_to_dict(row) for row in db.execute(stmt)]
+
+
+def recent_history(db: Session, session_id: str, limit: int = 10) -> List[dict]:
+    """Last ``limit`` messages of a chat session as {role, content}, oldest first.
+
+    A bounded backward scan of ix_conversations_session_created; nothing else is read.
+    """
+    rows = db.execute(
+        select(Conversation.role, Conversation.content)
+        .where(Conversation.session_id == session_id)
+        .order_by(Conversation.created_at.desc())
+        .limit(limit)
+    ).all()
+    return [row_to_dict(row) for row in reversed(rows)]
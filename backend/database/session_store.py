@@ -0,0 +1,109 @@
+"""
+AI Travel Guardian+ — Session State Store
+Keeps the full TravelState per chat session so follow-up turns can replan incrementally.
+In-memory LRU with TTL in front of the session_states table; writes are batched (write-behind).
+"""
+
+import json
+import zlib
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from database.database import ReadSessionLocal, write_session
+from database.models import SessionState
+from utils.cache import LRUCache
+from utils.logger import logger
+
+# Per-turn fields that must not leak into the next turn
+TRANSIENT_FIELDS = (
+    "user_message", "conversation_history", "response_text", "response_type", "error",
+    "needs_clarification", "clarification_question", "requires_replanning", "replan_change_type",
+)
+
+
+def encode_state(state: dict) -> bytes:
+    """Compact serialisation: transient fields dropped, minified JSON, zlib."""
+    persistent = {k: v for k, v in state.items() if k not in TRANSIENT_FIELDS}
+    return zlib.compress(json.dumps(persistent, separators=(",", ":"), default=str).encode("utf-8"))
+
+
+def decode_state(blob: bytes) -> dict:
+    """Inverse of encode_state."""
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class SessionStateStore:
+    """Session state cache with SQLite write-behind.
+
+    Memory holds encoded blobs (so callers can mutate what they load); ``flush`` writes
+    sessions saved since the last flush and purges rows older than the TTL.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 86400):
+        self.ttl = ttl
+        self._memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._dirty: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def load(self, session_id: str) -> Optional[dict]:
+        """Stored state for a session, or None (blocking on a memory miss)."""
+        blob = self._memory.get(session_id)
+        if blob is None:
+            with self._lock:
+                blob = self._dirty.get(session_id)
+        if blob is None:
+            blob = self._load_row(session_id)
+            if blob is None:
+                return None
+            self._memory.put(session_id, blob)
+        return decode_state(blob)
+
+    def _load_row(self, session_id: str) -> Optional[bytes]:
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl)
+        db = ReadSessionLocal()
+        try:
+            row = db.query(SessionState.state_blob).filter(
+                SessionState.session_id == session_id,
+                SessionState.updated_at >= cutoff,
+            ).first()
+            return row.state_blob if row else None
+        finally:
+            db.close()
+
+    def save(self, session_id: str, state: dict):
+        """Cache the session's state and queue it for the next flush."""
+        blob = encode_state(state)
+        self._memory.put(session_id, blob)
+        with self._lock:
+            self._dirty[session_id] = blob
+
+    def flush(self) -> int:
+        """Write queued sessions to the database; returns the number written."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+        if not dirty:
+            return 0
+
+        now = datetime.utcnow()
+        try:
+            with write_session() as db:
+                for session_id, blob in dirty.items():
+                    db.merge(SessionState(session_id=session_id, state_blob=blob, updated_at=now))
+                db.query(SessionState).filter(
+                    SessionState.updated_at < now - timedelta(seconds=self.ttl)
+                ).delete(synchronize_session=False)
+        except Exception as e:
+            # Requeue unless a newer save arrived meanwhile
+            with self._lock:
+                for session_id, blob in dirty.items():
+                    self._dirty.setdefault(session_id, blob)
+            logger.warning(f"[WARN] Session state flush failed: {e}")
+            return 0
+        return len(dirty)
+
+    def info(self) -> dict:
+        """Memory cache stats plus the number of sessions awaiting a flush."""
+        with self._lock:
+            pending = len(self._dirty)
+        return {**self._memory.info(), "pending_writes": pending}
@@ -1,12 +1,29 @@
 """
 AI Travel Guardian+ — Groq LLM Client
 Wrapper for Groq API with retry logic and streaming support.
+Provides blocking methods (chat, chat_json, stream_chat) and asyncio methods
+(achat, achat_json, astream_chat) backed by a shared keep-alive connection pool.
+Successful completions are served from an optional ResponseCache.
 """
 
 import time
 import json
+import random
+import asyncio
 from typing import AsyncGenerator, Optional, List, Dict
-from groq import Groq
+
+import httpx
+from groq import Groq, AsyncGroq
+
+from llm.response_cache import ResponseCache
+
+
+class StreamInterrupted(RuntimeError):
+    """A stream failed after yielding tokens; ``partial`` holds the text already delivered."""
+
+    def __init__(self, partial: str, cause: Exception):
+        super().__init__(f"LLM stream interrupted: {cause}")
+        self.partial = partial
 
 
 class GroqLLMClient:
@@ -14,18 +31,97 @@ class GroqLLMClient:
 
     def __init__(self, api_key: str, model: str = "llama3-8b-8192",
                  smart_model: str = "mixtral-8x7b-32768",
-                 max_retries: int = 3, retry_delay: int = 2):
+                 max_retries: int = 3, retry_delay: int = 2,
+                 max_connections: int = 100, max_keepalive_connections: int = 20,
+                 response_cache: Optional[ResponseCache] = None):
         self.client = Groq(api_key=api_key)
+        # One pooled HTTP/1.1 keep-alive client shared by every coroutine in the process
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            timeout=httpx.Timeout(60.0, connect=10.0),
+        )
+        self.async_client = AsyncGroq(api_key=api_key, http_client=self.http_client, max_retries=0)
         self.model = model
         self.fast_model = model
         self.smart_model = smart_model
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.response_cache = response_cache
+
+    def _cache_key(self, model: str, messages: List[Dict], temperature: float,
+                   max_tokens: int, json_mode: bool = False) -> Optional[str]:
+        if self.response_cache is None:
+            return None
+        return ResponseCache.make_key(model, messages, temperature, max_tokens, json_mode)
+
+    def _cache_get(self, key: Optional[str], tag: Optional[str]):
+        return self.response_cache.get(key, tag) if key else None
+
+    def _cache_put(self, key: Optional[str], value, tag: Optional[str]):
+        # Only successful completions are stored; error payloads must be retried next time
+        if key and value and not (isinstance(value, dict) and "error" in value):
+            self.response_cache.put(key, value, tag)
+
+    # The async methods must not run the cache's SQLite tier (blocking I/O under a lock) on the event loop
+    async def _acache_get(self, key: Optional[str], tag: Optional[str]):
+        if key and self.response_cache.persistent:
+            return await asyncio.to_thread(self._cache_get, key, tag)
+        return self._cache_get(key, tag)
+
+    async def _acache_put(self, key: Optional[str], value, tag: Optional[str]):
+        if key and self.response_cache.persistent:
+            await asyncio.to_thread(self._cache_put, key, value, tag)
+        else:
+            self._cache_put(key, value, tag)
+
+    def cache_info(self) -> Optional[dict]:
+        """Response cache stats, or None if caching is disabled."""
+        return self.response_cache.info() if self.response_cache else None
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with jitter so concurrent retries don't synchronise."""
+        return self.retry_delay * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    @staticmethod
+    def _parse_json(raw: str) -> dict:
+        """Parse a JSON completion, tolerating markdown fences and surrounding prose."""
+        raw = raw.strip()
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            pass
+        # Fallback: strip markdown fences
+        if raw.startswith("```"):
+            raw = raw.split("\n", 1)[1] if "\n" in raw else raw[3:]
+        if raw.endswith("```"):
+            raw = raw[:-3]
+        raw = raw.strip()
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            pass
+        # Fallback: find JSON object or array
+        for start_char, end_char in [("{", "}"), ("[", "]")]:
+            start = raw.find(start_char)
+            end = raw.rfind(end_char) + 1
+            if start >= 0 and end > start:
+                try:
+                    return json.loads(raw[start:end])
+                except json.JSONDecodeError:
+                    continue
+        return {"error": "Failed to parse JSON", "raw": raw[:500]}
 
     def chat(self, messages: List[Dict], model: str = None,
-             temperature: float = 0.3, max_tokens: int = 1500) -> str:
+             temperature: float = 0.3, max_tokens: int = 1500, tag: Optional[str] = None) -> str:
         """Non-streaming chat completion with retry logic."""
         use_model = model or self.smart_model
+        key = self._cache_key(use_model, messages, temperature, max_tokens)
+        cached = self._cache_get(key, tag)
+        if cached is not None:
+            return cached
 
         for attempt in range(self.max_retries):
             try:
@@ -35,20 +131,25 @@ class GroqLLMClient:
                     temperature=temperature,
                     max_tokens=max_tokens,
                 )
-                return response.choices[0].message.content or ""
+                content = response.choices[0].message.content or ""
+                self._cache_put(key, content, tag)
+                return content
             except Exception as e:
                 if attempt < self.max_retries - 1:
-                    wait = self.retry_delay * (2 ** attempt)
-                    time.sleep(wait)
+                    time.sleep(self._backoff(attempt))
                 else:
                     raise RuntimeError(f"Groq API failed after {self.max_retries} retries: {e}")
 
     def chat_json(self, messages: List[Dict], model: str = None,
-                  temperature: float = 0.1, max_tokens: int = 2000) -> dict:
+                  temperature: float = 0.1, max_tokens: int = 2000, tag: Optional[str] = None) -> dict:
         """Chat completion that returns parsed JSON.
         Uses Groq's native JSON mode for reliable structured output.
         """
         use_model = model or self.smart_model
+        key = self._cache_key(use_model, messages, temperature, max_tokens, json_mode=True)
+        cached = self._cache_get(key, tag)
+        if cached is not None:
+            return cached
 
         for attempt in range(self.max_retries):
             try:
@@ -59,43 +160,24 @@ class GroqLLMClient:
                     max_tokens=max_tokens,
                     response_format={"type": "json_object"},
                 )
-                raw = response.choices[0].message.content or ""
-                raw = raw.strip()
-                try:
-                    return json.loads(raw)
-                except json.JSONDecodeError:
-                    pass
-                # Fallback: strip markdown fences
-                if raw.startswith("```"):
-                    raw = raw.split("\n", 1)[1] if "\n" in raw else raw[3:]
-                if raw.endswith("```"):
-                    raw = raw[:-3]
-                raw = raw.strip()
-                try:
-                    return json.loads(raw)
-                except json.JSONDecodeError:
-                    pass
-                # Fallback: find JSON object or array
-                for start_char, end_char in [("{", "}"), ("[", "]")]:
-                    start = raw.find(start_char)
-                    end = raw.rfind(end_char) + 1
-                    if start >= 0 and end > start:
-                        try:
-                            return json.loads(raw[start:end])
-                        except json.JSONDecodeError:
-                            continue
-                return {"error": "Failed to parse JSON", "raw": raw[:500]}
+                result = self._parse_json(response.choices[0].message.content or "")
+                self._cache_put(key, result, tag)
+                return result
             except Exception as e:
                 if attempt < self.max_retries - 1:
-                    wait = self.retry_delay * (2 ** attempt)
-                    time.sleep(wait)
+                    time.sleep(self._backoff(attempt))
                 else:
                     return {"error": f"Groq API failed: {str(e)[:200]}"}
 
     def stream_chat(self, messages: List[Dict], model: str = None,
-                    temperature: float = 0.3, max_tokens: int = 1500):
+                    temperature: float = 0.3, max_tokens: int = 1500, tag: Optional[str] = None):
         """Streaming chat completion (synchronous generator)."""
         use_model = model or self.smart_model
+        key = self._cache_key(use_model, messages, temperature, max_tokens)
+        cached = self._cache_get(key, tag)
+        if cached is not None:
+            yield cached
+            return
 
         for attempt in range(self.max_retries):
             try:
@@ -106,18 +188,117 @@ class GroqLLMClient:
                     max_tokens=max_tokens,
                     stream=True,
                 )
+                tokens = []
                 for chunk in stream:
                     content = chunk.choices[0].delta.content
                     if content:
+                        tokens.append(content)
                         yield content
+                self._cache_put(key, "".join(tokens), tag)
                 return
             except Exception as e:
                 if attempt < self.max_retries - 1:
-                    wait = self.retry_delay * (2 ** attempt)
-                    time.sleep(wait)
+                    time.sleep(self._backoff(attempt))
                 else:
                     yield f"\n[Error: LLM service unavailable after {self.max_retries} retries]"
 
+    async def achat(self, messages: List[Dict], model: str = None,
+                    temperature: float = 0.3, max_tokens: int = 1500, tag: Optional[str] = None) -> str:
+        """Async non-streaming chat completion with jittered retry."""
+        use_model = model or self.smart_model
+        key = self._cache_key(use_model, messages, temperature, max_tokens)
+        cached = await self._acache_get(key, tag)
+        if cached is not None:
+            return cached
+
+        for attempt in range(self.max_retries):
+            try:
+                response = await self.async_client.chat.completions.create(
+                    model=use_model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                )
+                content = response.choices[0].message.content or ""
+                await self._acache_put(key, content, tag)
+                return content
+            except Exception as e:
+                if attempt < self.max_retries - 1:
+                    await asyncio.sleep(self._backoff(attempt))
+                else:
+                    raise RuntimeError(f"Groq API failed after {self.max_retries} retries: {e}")
+
+    async def achat_json(self, messages: List[Dict], model: str = None,
+                         temperature: float = 0.1, max_tokens: int = 2000, tag: Optional[str] = None) -> dict:
+        """Async chat completion that returns parsed JSON (Groq JSON mode)."""
+        use_model = model or self.smart_model
+        key = self._cache_key(use_model, messages, temperature, max_tokens, json_mode=True)
+        cached = await self._acache_get(key, tag)
+        if cached is not None:
+            return cached
+
+        for attempt in range(self.max_retries):
+            try:
+                response = await self.async_client.chat.completions.create(
+                    model=use_model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    response_format={"type": "json_object"},
+                )
+                result = self._parse_json(response.choices[0].message.content or "")
+                await self._acache_put(key, result, tag)
+                return result
+            except Exception as e:
+                if attempt < self.max_retries - 1:
+                    await asyncio.sleep(self._backoff(attempt))
+                else:
+                    return {"error": f"Groq API failed: {str(e)[:200]}"}
+
+    async def astream_chat(self, messages: List[Dict], model: str = None,
+                           temperature: float = 0.3, max_tokens: int = 1500,
+                           tag: Optional[str] = None) -> AsyncGenerator[str, None]:
+        """Async streaming chat completion yielding content tokens as they arrive.
+
+        Retries only if the stream fails before the first token, so callers never see duplicates.
+        Raises RuntimeError if no token could be produced, or StreamInterrupted mid-stream.
+        """
+        use_model = model or self.smart_model
+        key = self._cache_key(use_model, messages, temperature, max_tokens)
+        cached = await self._acache_get(key, tag)
+        if cached is not None:
+            yield cached
+            return
+
+        for attempt in range(self.max_retries):
+            tokens = []
+            try:
+                stream = await self.async_client.chat.completions.create(
+                    model=use_model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                )
+                async for chunk in stream:
+                    content = chunk.choices[0].delta.content
+                    if content:
+                        tokens.append(content)
+                        yield content
+                await self._acache_put(key, "".join(tokens), tag)
+                return
+            except Exception as e:
+                if tokens:
+                    raise StreamInterrupted("".join(tokens), e) from e
+                if attempt < self.max_retries - 1:
+                    await asyncio.sleep(self._backoff(attempt))
+                else:
+                    raise RuntimeError(f"Groq API failed after {self.max_retries} retries: {e}") from e
+
+    async def aclose(self):
+        """Close the pooled async HTTP connections."""
+        await self.http_client.aclose()
+
     def test_connection(self) -> bool:
         """Test if Groq API is reachable."""
         try:
@@ -150,35 +150,6 @@ Output as JSON:
   ]
 }}"""
 
-REPLAN_DETECTION_PROMPT = """Analyse this user message and determine if they want to change their existing travel plan.
-
-User Message: {user_message}
-Current Plan Summary: {current_plan}
-
-Detect changes in these categories:
-  - date_change: different travel date or return date
-  - duration_change: different number of days
-  - budget_change: different budget level
-  - passenger_change: different number of passengers
-  - priority_change: different flight preference priority
-  - destination_change: entirely different destination
-  - no_change: general question or conversation
-
-Output JSON:
-{{
-  "requires_replanning": false,
-  "change_type": "no_change",
-  "new_values": {{
-    "num_days": null,
-    "budget": null,
-    "priority": null,
-    "num_passengers": null,
-    "travel_date": null,
-    "destination": null
-  }},
-  "user_friendly_confirm": "summary of changes or null"
-}}"""
-
 GENERAL_CHAT_PROMPT = """You are AI Travel Guardian+, a friendly, knowledgeable travel assistant specialising in
 flight intelligence and trip planning. You have access to real ML-powered flight delay
 predictions, airline sentiment scores, and comprehensive city knowledge.
@@ -200,3 +171,57 @@ Rules:
 5. If you cannot answer, say so clearly and suggest what information you'd need
 6. Keep responses concise (under 200 words) unless generating an itinerary
 7. Use emojis sparingly but naturally (1-2 per response max)"""
+
+TURN_ANALYSIS_PROMPT = """Analyse this follow-up message from a user who already has a travel plan.
+Do two things in one pass: extract the travel intent, and decide whether the user wants to change the plan.
+
+User Message: {user_message}
+Current Plan Summary: {current_plan}
+
+1. "intent": the travel information stated in the message (null for anything not mentioned).
+If the message is about travel but source, destination and travel_date cannot be determined from
+the message or the current plan, set needs_clarification to true.
+Extract priority from phrases like:
+  "hate delays" / "reliable" -> "low_delay"
+  "cheap" / "budget" / "affordable" -> "low_price"
+  "comfortable" / "best service" / "premium" -> "best_service"
+
+2. "replan": the change to the current plan, one of:
+  - date_change: different travel date or return date
+  - duration_change: different number of days
+  - budget_change: different budget level
+  - passenger_change: different number of passengers
+  - priority_change: different flight preference priority
+  - destination_change: entirely different destination
+  - no_change: general question or conversation
+
+Output ONLY valid JSON:
+{{
+  "intent": {{
+    "source": "city name or IATA code or null",
+    "destination": "city name or IATA code or null",
+    "travel_date": "YYYY-MM-DD or null",
+    "return_date": "YYYY-MM-DD or null",
+    "num_days": null,
+    "budget": "budget|medium|luxury or null",
+    "priority": "low_delay|low_price|best_service|balanced or null",
+    "num_passengers": null,
+    "dietary": "veg|nonveg|any or null",
+    "traveller_type": "solo|couple|family|business or null",
+    "needs_clarification": false,
+    "clarification_question": null
+  }},
+  "replan": {{
+    "requires_replanning": false,
+    "change_type": "no_change",
+    "new_values": {{
+      "num_days": null,
+      "budget": null,
+      "priority": null,
+      "num_passengers": null,
+      "travel_date": null,
+      "destination": null
+    }},
+    "user_friendly_confirm": "summary of changes or null"
+  }}
+}}"""
@@ -0,0 +1,170 @@
+"""
+AI Travel Guardian+ — LLM Response Cache
+Caches completions keyed on a hash of (model, messages, temperature, max_tokens, mode).
+In-memory LRU with TTL, optionally backed by a SQLite file so entries survive restarts.
+Hit/miss counters are kept per prompt template (the ``tag`` passed by each agent).
+Parsed-JSON values are copied on the way in and out, so callers may mutate what they get.
+"""
+
+import copy
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from utils.cache import LRUCache
+from utils.logger import logger
+
+# Disk maintenance (expired-row purge and size trim) runs once every this many writes
+_PRUNE_EVERY = 100
+
+
+class ResponseCache:
+    """Two-level (memory, optional SQLite) cache for LLM completions."""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = 86400,
+                 path: Optional[str] = None, disk_maxsize: int = 20000):
+        self.ttl = ttl
+        self.disk_maxsize = disk_maxsize
+        self._memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+        if path:
+            self._open(Path(path))
+
+    def _open(self, path: Path):
+        """Open (or create) the SQLite backing store; on failure the cache stays memory-only."""
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, tag TEXT, "
+                "created_at REAL NOT NULL, expires_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_created ON llm_cache (created_at)")
+            conn.commit()
+            self._conn = conn
+            self._prune()
+        except sqlite3.Error as e:
+            logger.warning(f"[WARN] LLM response cache disk backend unavailable ({path}): {e}")
+            self._conn = None
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict], temperature: float,
+                 max_tokens: int, json_mode: bool = False) -> str:
+        """Stable hash of everything that determines a completion."""
+        payload = json.dumps(
+            [model, messages, round(float(temperature), 4), max_tokens, json_mode],
+            sort_keys=True, ensure_ascii=False, separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @property
+    def persistent(self) -> bool:
+        """True if lookups and stores may touch the SQLite file (blocking I/O)."""
+        return self._conn is not None
+
+    def get(self, key: str, tag: Optional[str] = None) -> Any:
+        """Cached completion (str or parsed JSON) or None."""
+        value = self._memory.get(key)
+        if value is None and self._conn is not None:
+            value = self._disk_get(key)
+            if value is not None:
+                self._memory.put(key, value)
+        with self._lock:
+            self._stats[tag or "untagged"]["hits" if value is not None else "misses"] += 1
+        return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+    def put(self, key: str, value: Any, tag: Optional[str] = None):
+        """Store a successful completion."""
+        self._memory.put(key, copy.deepcopy(value) if isinstance(value, (dict, list)) else value)
+        if self._conn is not None:
+            self._disk_put(key, value, tag)
+
+    def _disk_get(self, key: str) -> Any:
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error:
+                return None
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return None
+        return json.loads(row[0])
+
+    def _disk_put(self, key: str, value: Any, tag: Optional[str]):
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl is not None else None
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, tag, created_at, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), tag, now, expires_at),
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"[WARN] LLM response cache write failed: {e}")
+                return
+            self._writes += 1
+            if self._writes % _PRUNE_EVERY:
+                return
+        self._prune()
+
+    def _prune(self):
+        """Drop expired rows and trim the table to the newest ``disk_maxsize`` entries."""
+        with self._lock:
+            try:
+                self._conn.execute("DELETE FROM llm_cache WHERE expires_at IS NOT NULL AND expires_at < ?",
+                                   (time.time(),))
+                self._conn.execute(
+                    "DELETE FROM llm_cache WHERE key NOT IN "
+                    "(SELECT key FROM llm_cache ORDER BY created_at DESC LIMIT ?)",
+                    (self.disk_maxsize,),
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"[WARN] LLM response cache prune failed: {e}")
+
+    def clear(self):
+        """Drop all cached completions (memory and disk)."""
+        self._memory.clear()
+        if self._conn is not None:
+            with self._lock:
+                self._conn.execute("DELETE FROM llm_cache")
+                self._conn.commit()
+
+    def info(self) -> dict:
+        """Overall and per-template hit/miss counts, plus memory-tier stats."""
+        def with_rate(counts: Dict[str, int]) -> dict:
+            lookups = counts["hits"] + counts["misses"]
+            return {**counts, "hit_rate": round(counts["hits"] / lookups, 4) if lookups else 0.0}
+
+        with self._lock:
+            templates = {tag: with_rate(counts) for tag, counts in sorted(self._stats.items())}
+            total = {
+                "hits": sum(c["hits"] for c in self._stats.values()),
+                "misses": sum(c["misses"] for c in self._stats.values()),
+            }
+        return {
+            **with_rate(total),
+            "memory": self._memory.info(),
+            "disk": self._conn is not None,
+            "templates": templates,
+        }
+
+    def close(self):
+        """Close the SQLite backing store."""
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
@@ -4,7 +4,11 @@ Initializes database, ML models, FAISS indices, and all API routes.
 """
 
 import json
+import asyncio
+import multiprocessing
+from datetime import datetime
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -17,12 +21,138 @@ app_state = {}
 delay_predictor = None
 agent_pipeline = None
 rag_retriever = None
+session_store = None
+background_tasks = []
+
+
+def _precompute_if_stale(predictor) -> None:
+    """Store delay predictions for the predictor's model version unless they already exist."""
+    from database.database import SessionLocal
+    from ml.precompute_predictions import has_predictions, precompute_predictions
+
+    db = SessionLocal()
+    try:
+        stored = has_predictions(db, predictor.model_version)
+    except Exception:
+        stored = False
+    finally:
+        db.close()
+
+    if stored:
+        logger.info(f"[OK] Delay predictions up to date (model {predictor.model_version})")
+        return
+    count = precompute_predictions(predictor)
+    logger.info(f"[OK] Precomputed {count} delay predictions (model {predictor.model_version})")
+
+
+async def _train_in_worker(csv_path: Path) -> dict:
+    """Run train_job in a spawned process, reporting progress through a Manager dict.
+
+    On cancellation the worker is terminated instead of waited for, so shutdown never
+    blocks the event loop until training finishes.
+    """
+    from ml.train_model import train_job
+
+    loop = asyncio.get_running_loop()
+    manager = multiprocessing.Manager()
+    # Spawn (not fork) so the worker doesn't inherit the event loop and server threads
+    pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        progress = manager.dict(round=0, started_at=datetime.utcnow().isoformat())
+        app_state["training_progress"] = progress
+        metrics = await loop.run_in_executor(pool, train_job, str(csv_path), progress)
+        app_state["training_progress"] = dict(progress)
+        return metrics
+    except asyncio.CancelledError:
+        app_state["training_progress"] = None
+        # ProcessPoolExecutor has no public way to stop a running task before Python 3.14
+        for process in list((pool._processes or {}).values()):
+            process.terminate()
+        raise
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        manager.shutdown()
+
+
+def _mark_model_ready() -> None:
+    app_state["model_status"] = "ready"
+    app_state["model_loaded"] = True
+
+
+async def _warm_delay_model(predictor) -> None:
+    """Train the delay model in a worker process if needed, swap it in, then precompute predictions.
+
+    Runs after startup so the API is ready immediately; until the model is swapped in the
+    predictor serves heuristic scores. Training and precompute run behind a file lock, so
+    with several uvicorn workers only one trains; the others poll CURRENT and hot-swap to
+    the artifact it publishes.
+    """
+    from ml.delay_predictor import TrainingLock
+
+    lock = TrainingLock(predictor.artifact_dir)
+    try:
+        while not lock.acquire():
+            await asyncio.sleep(predictor.reload_interval)
+            if predictor.model is None and await asyncio.to_thread(predictor.maybe_reload, True):
+                _mark_model_ready()
+
+        # Another worker may have published while this one waited for the lock
+        if predictor.model is None and await asyncio.to_thread(predictor.maybe_reload, True):
+            _mark_model_ready()
+
+        if predictor.model is None:
+            csv_path = Path(__file__).resolve().parent.parent / "data" / "sample_flights.csv"
+            if not csv_path.exists():
+                logger.warning("[WARN] No flight data CSV found for training")
+                app_state["model_status"] = "heuristic"
+                return
+
+            metrics = await _train_in_worker(csv_path)
+            await asyncio.to_thread(predictor.reload)
+            _mark_model_ready()
+            logger.info(f"[OK] Model trained -- Accuracy: {metrics['accuracy']}, AUC: {metrics['roc_auc']} "
+                        f"(model {predictor.model_version})")
+
+        await asyncio.to_thread(_precompute_if_stale, predictor)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"[ERROR] Background model preparation failed: {e}")
+        if predictor.model is None:
+            app_state["model_status"] = "failed"
+    finally:
+        lock.release()
+
+
+async def _flush_session_states(store) -> None:
+    """Write-behind loop persisting chat session state."""
+    while True:
+        await asyncio.sleep(settings.SESSION_FLUSH_INTERVAL)
+        try:
+            await asyncio.to_thread(store.flush)
+        except Exception as e:
+            logger.error(f"[ERROR] Session state flush failed: {e}")
+
+
+async def _compact_conversations() -> None:
+    """Periodically archive old chat turns into compressed per-session blobs."""
+    from database.conversation_archive import compact_conversations
+    while True:
+        try:
+            await asyncio.to_thread(
+                compact_conversations,
+                settings.CONVERSATION_RETENTION_DAYS,
+                settings.CONVERSATION_KEEP_RECENT,
+            )
+        except Exception as e:
+            logger.error(f"[ERROR] Conversation compaction failed: {e}")
+        await asyncio.sleep(settings.CONVERSATION_COMPACT_INTERVAL)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application startup and shutdown lifecycle."""
-    global delay_predictor, agent_pipeline, rag_retriever
+    global delay_predictor, agent_pipeline, rag_retriever, session_store
 
     logger.info("=" * 60)
     logger.info("  AI Travel Guardian+ — Starting Up")
@@ -32,7 +162,7 @@ async def lifespan(app: FastAPI):
     try:
         from database.database import init_db, engine
         init_db()
-        logger.info("[OK] Database tables created")
+        logger.info(f"[OK] Database tables created ({engine.url.render_as_string(hide_password=True)})")
         app_state["db"] = "connected"
     except Exception as e:
         logger.error(f"[ERROR] Database init failed: {e}")
@@ -51,27 +181,26 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"[ERROR] Seed data failed: {e}")
 
-    # 3. Train/load ML model
+    # 3. Load ML model (training runs in the background if none is on disk)
     try:
         from ml.delay_predictor import FlightDelayPredictor
-        predictor = FlightDelayPredictor()
+        predictor = FlightDelayPredictor(
+            cache_size=settings.PREDICTION_CACHE_SIZE,
+            explainer_backend=settings.SHAP_BACKEND,
+            scoring_backend=settings.DELAY_MODEL_BACKEND,
+        )
+        delay_predictor = predictor
         if predictor.model is None:
-            logger.info("[INFO] Training XGBoost model...")
-            import pandas as pd
-            data_dir = Path(__file__).resolve().parent.parent / "data"
-            csv_path = data_dir / "sample_flights.csv"
-            if csv_path.exists():
-                df = pd.read_csv(csv_path)
-                metrics = predictor.train(df)
-                logger.info(f"[OK] Model trained -- Accuracy: {metrics['accuracy']}, AUC: {metrics['roc_auc']}")
-            else:
-                logger.warning("[WARN] No flight data CSV found for training")
+            logger.info("[INFO] No ML model on disk -- serving heuristic delay scores while training in background")
+            app_state["model_status"] = "training"
         else:
             logger.info("[OK] ML model loaded from disk")
-        delay_predictor = predictor
-        app_state["model_loaded"] = True
+            app_state["model_status"] = "ready"
+            app_state["model_loaded"] = True
+        background_tasks.append(asyncio.create_task(_warm_delay_model(predictor)))
     except Exception as e:
         logger.error(f"[ERROR] ML model failed: {e}")
+        app_state["model_status"] = "failed"
         app_state["model_loaded"] = False
 
     # 4. Build FAISS indices
@@ -126,12 +255,26 @@ async def lifespan(app: FastAPI):
     # 5. Initialize Groq LLM + Agent Pipeline
     try:
         from llm.groq_client import GroqLLMClient
+        from llm.response_cache import ResponseCache
         from agents.graph import TravelAgentPipeline
 
+        response_cache = None
+        if settings.LLM_CACHE_SIZE > 0:
+            response_cache = ResponseCache(
+                maxsize=settings.LLM_CACHE_SIZE,
+                ttl=settings.LLM_CACHE_TTL,
+                path=settings.LLM_CACHE_PATH or None,
+            )
+
         llm_client = GroqLLMClient(
             api_key=settings.GROQ_API_KEY,
             model=settings.GROQ_MODEL,
             smart_model=settings.GROQ_SMART_MODEL,
+            max_retries=settings.GROQ_MAX_RETRIES,
+            retry_delay=settings.GROQ_RETRY_DELAY,
+            max_connections=settings.GROQ_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.GROQ_MAX_KEEPALIVE_CONNECTIONS,
+            response_cache=response_cache,
         )
 
         if settings.GROQ_API_KEY != "your_groq_api_key_here":
@@ -142,19 +285,46 @@ async def lifespan(app: FastAPI):
             app_state["groq_status"] = "no_key"
             logger.warning("[WARN] No Groq API key configured -- LLM features disabled")
 
+        intent_cache = None
+        if rag_retriever and settings.INTENT_CACHE_SIZE > 0:
+            from rag.intent_cache import SemanticIntentCache
+            intent_cache = SemanticIntentCache(
+                embedder=rag_retriever.embedder,
+                threshold=settings.INTENT_CACHE_THRESHOLD,
+                maxsize=settings.INTENT_CACHE_SIZE,
+            )
+
         agent_pipeline = TravelAgentPipeline(
             llm_client=llm_client,
             delay_predictor=delay_predictor,
             rag_retriever=rag_retriever,
+            max_workers=settings.AGENT_MAX_WORKERS,
+            intent_cache=intent_cache,
         )
         logger.info("[OK] Agent pipeline initialized")
     except Exception as e:
         logger.error(f"[ERROR] Agent pipeline init failed: {e}")
 
+    # 6. Session state store (write-behind to SQLite)
+    try:
+        from database.session_store import SessionStateStore
+        session_store = SessionStateStore(
+            maxsize=settings.SESSION_CACHE_SIZE,
+            ttl=settings.SESSION_STATE_TTL,
+        )
+        background_tasks.append(asyncio.create_task(_flush_session_states(session_store)))
+        logger.info("[OK] Session state store ready")
+    except Exception as e:
+        logger.error(f"[ERROR] Session state store init failed: {e}")
+
+    # 7. Conversation history compaction
+    if settings.CONVERSATION_COMPACT_INTERVAL > 0:
+        background_tasks.append(asyncio.create_task(_compact_conversations()))
+
     logger.info("=" * 60)
     logger.info("  AI Travel Guardian+ -- Ready!")
     logger.info(f"  DB: {app_state.get('db', 'unknown')}")
-    logger.info(f"  Model: {'loaded' if app_state.get('model_loaded') else 'not loaded'}")
+    logger.info(f"  Model: {app_state.get('model_status', 'unknown')}")
     logger.info(f"  Groq: {app_state.get('groq_status', 'unknown')}")
     logger.info(f"  FAISS: {app_state.get('faiss_status', 'unknown')}")
     logger.info("=" * 60)
@@ -163,6 +333,18 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("AI Travel Guardian+ shutting down...")
+    for task in background_tasks:
+        task.cancel()
+    if session_store:
+        session_store.flush()
+    if agent_pipeline:
+        await agent_pipeline.llm.aclose()
+        if agent_pipeline.llm.response_cache:
+            agent_pipeline.llm.response_cache.close()
+    from database.database import async_engine
+    await async_engine.dispose()
+    from utils.executors import shutdown_executors
+    shutdown_executors()
 
 
 # Create FastAPI app
@@ -1,21 +1,36 @@
 """
 AI Travel Guardian+ — Flight Delay Predictor
 XGBoost model that predicts flight delay probability using 13 engineered features.
-Uses SHAP TreeExplainer for model interpretability.
+Models are stored as versioned native artifacts (UBJSON booster + encoder vocabulary + manifest).
+SHAP contributions come from XGBoost's native TreeSHAP (pred_contribs) by default,
+or from shap.TreeExplainer when explainer_backend="shap".
 """
 
 import os
+import json
 import pickle
+import time
+import shutil
+import hashlib
+import threading
+from datetime import datetime
 import numpy as np
 import pandas as pd
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, NamedTuple, Optional
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
 import xgboost as xgb
-import shap
 
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, every process may train
+    fcntl = None
+
+from ml.tree_compiler import CompiledTreeEnsemble, check_parity
+from utils.cache import LRUCache
+from utils.logger import logger
 from utils.helpers import is_indian_holiday
 
 
@@ -43,91 +58,367 @@ FEATURE_LABELS = {
     "destination_encoded": "Arrival Airport",
 }
 
+# Months whose mid-month date falls on a holiday (is_holiday feature)
+HOLIDAY_MONTHS = np.array([m for m in range(1, 13) if is_indian_holiday(m, 15)], dtype=int)
+
 MODELS_DIR = Path(__file__).resolve().parent / "models"
 MODELS_DIR.mkdir(parents=True, exist_ok=True)
 
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+TRAIN_LOCK_FILE = ".train.lock"
+
+# Hyperparameters for a full training run; also assumed for artifacts whose manifest predates "params"
+TRAIN_PARAMS = {
+    "n_estimators": 200,
+    "max_depth": 6,
+    "learning_rate": 0.1,
+    "subsample": 0.8,
+    "colsample_bytree": 0.8,
+    "min_child_weight": 3,
+    "gamma": 0.1,
+    "reg_alpha": 0.1,
+    "reg_lambda": 1.0,
+    "random_state": 42,
+    "eval_metric": "logloss",
+}
+
+
+def _model_params(model: xgb.XGBClassifier) -> dict:
+    """JSON-serialisable hyperparameters of a classifier (for the artifact manifest)."""
+    return {k: v for k, v in model.get_params().items()
+            if isinstance(v, (bool, int, float, str)) and k != "use_label_encoder"}
+
+
+def _write_atomic(path: Path, text: str):
+    """Replace a small text file atomically so readers never see a partial write."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class TrainingLock:
+    """Non-blocking advisory file lock so only one process trains and publishes at a time.
+
+    The OS releases it if the holder dies, so a crashed trainer never blocks the others.
+    """
+
+    def __init__(self, artifact_dir: Path):
+        self.path = artifact_dir / TRAIN_LOCK_FILE
+        self._file = None
+
+    def acquire(self) -> bool:
+        if self._file is not None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        f = open(self.path, "a")
+        if fcntl is not None:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                f.close()
+                return False
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+
+class ModelSnapshot(NamedTuple):
+    """Everything scoring needs from one model version, published with a single assignment."""
+    model: xgb.XGBClassifier
+    encoders: Dict[str, LabelEncoder]
+    lookups: Dict[str, pd.Index]  # label -> code index per categorical column
+    version: str
+    params: dict
+    compiled: Optional[CompiledTreeEnsemble]
+    explainer: Any  # shap.TreeExplainer for explainer_backend="shap"
+
+
+class _ProgressCallback(xgb.callback.TrainingCallback):
+    """Publishes the current boosting round to a shared dict (e.g. a multiprocessing.Manager proxy)."""
+
+    def __init__(self, progress, total_rounds: int):
+        super().__init__()
+        self.progress = progress
+        self.progress["total_rounds"] = total_rounds
+
+    def after_iteration(self, model, epoch, evals_log) -> bool:
+        self.progress["round"] = epoch + 1
+        return False
 
-class FlightDelayPredictor:
-    """XGBoost-based flight delay prediction with SHAP explanations."""
 
-    def __init__(self, model_path: str = None, encoder_path: str = None):
+class FlightDelayPredictor:
+    """XGBoost-based flight delay prediction with SHAP explanations.
+
+    The loaded model lives in an immutable ModelSnapshot; hot-swaps replace it in one
+    assignment and each prediction reads it once, so a score, its SHAP values and its
+    cache key always come from the same version.
+    """
+
+    def __init__(self, artifact_dir: str = None, model_path: str = None, encoder_path: str = None,
+                 cache_size: int = 4096, explainer_backend: str = "booster",
+                 scoring_backend: str = "xgboost", reload_interval: float = 30.0):
+        self.artifact_dir = Path(artifact_dir) if artifact_dir else MODELS_DIR / "delay_model"
+        # Legacy pickle artifacts, only read to migrate them to the native format
         self.model_path = Path(model_path) if model_path else MODELS_DIR / "xgboost_delay_model.pkl"
         self.encoder_path = Path(encoder_path) if encoder_path else MODELS_DIR / "label_encoders.pkl"
-        self.model: Optional[xgb.XGBClassifier] = None
-        self.label_encoders: Dict[str, LabelEncoder] = {}
-        self.explainer: Optional[shap.TreeExplainer] = None
-
-        if self.model_path.exists() and self.encoder_path.exists():
+        self.explainer_backend = explainer_backend
+        self.scoring_backend = scoring_backend
+        self._snapshot: Optional[ModelSnapshot] = None
+        self._prediction_cache = LRUCache(maxsize=cache_size)
+        self.reload_interval = reload_interval
+        self._last_reload_check = time.monotonic()
+        self._swap_lock = threading.RLock()
+
+        if (self.artifact_dir / CURRENT_FILE).exists():
             self._load_model()
+        elif self.model_path.exists() and self.encoder_path.exists():
+            self._migrate_pickle()
+
+    @property
+    def model(self) -> Optional[xgb.XGBClassifier]:
+        snapshot = self._snapshot
+        return snapshot.model if snapshot else None
+
+    @property
+    def model_version(self) -> Optional[str]:
+        snapshot = self._snapshot
+        return snapshot.version if snapshot else None
+
+    @property
+    def label_encoders(self) -> Dict[str, LabelEncoder]:
+        snapshot = self._snapshot
+        return snapshot.encoders if snapshot else {}
+
+    def _publish(self, model: xgb.XGBClassifier, encoders: Dict[str, LabelEncoder], version: str, params: dict):
+        """Build the snapshot for a model version and swap it in."""
+        snapshot = ModelSnapshot(
+            model=model,
+            encoders=encoders,
+            lookups={col: pd.Index(le.classes_) for col, le in encoders.items()},
+            version=version,
+            params=params,
+            compiled=self._build_compiled(model, version),
+            explainer=self._build_explainer(model),
+        )
+        with self._swap_lock:
+            self._snapshot = snapshot
+            self._prediction_cache.clear()
 
     def _load_model(self):
-        """Load saved model and encoders from disk."""
+        """Load the current native model artifact (UBJSON booster + encoder vocabulary)."""
+        version = (self.artifact_dir / CURRENT_FILE).read_text(encoding="utf-8").strip()
+        version_dir = self.artifact_dir / version
+        manifest = json.loads((version_dir / MANIFEST_FILE).read_text(encoding="utf-8"))
+
+        if manifest.get("feature_names") != FEATURE_NAMES:
+            raise RuntimeError(f"Model artifact {version} was built for a different feature schema")
+
+        # Verify against the manifest hash before loading
+        booster_bytes = (version_dir / manifest["files"]["booster"]).read_bytes()
+        vocab_bytes = (version_dir / manifest["files"]["encoders"]).read_bytes()
+        if hashlib.sha256(booster_bytes + vocab_bytes).hexdigest() != manifest["sha256"]:
+            raise RuntimeError(f"Model artifact {version} failed its content hash check")
+
+        # The UBJ booster does not carry the sklearn wrapper's hyperparameters; restore them
+        params = {**TRAIN_PARAMS, **manifest.get("params", {})}
+        model = xgb.XGBClassifier(**params)
+        model.load_model(bytearray(booster_bytes))
+
+        encoders = {}
+        for col, classes in json.loads(vocab_bytes).items():
+            le = LabelEncoder()
+            le.classes_ = np.asarray(classes, dtype=object)
+            encoders[col] = le
+
+        self._publish(model, encoders, manifest["version"], params)
+
+    def reload(self):
+        """Load the artifact CURRENT points at (e.g. after training finished in another process)."""
+        with self._swap_lock:
+            self._load_model()
+
+    def maybe_reload(self, force: bool = False) -> bool:
+        """Hot-swap to a newer artifact if CURRENT has moved (checked at most every reload_interval
+        seconds unless ``force``). Also picks up the first artifact another process publishes."""
+        now = time.monotonic()
+        if not force and now - self._last_reload_check < self.reload_interval:
+            return False
+        self._last_reload_check = now
+
+        try:
+            version = (self.artifact_dir / CURRENT_FILE).read_text(encoding="utf-8").strip()
+        except OSError:
+            return False
+        if version == self.model_version:
+            return False
+
+        with self._swap_lock:
+            if version == self.model_version:
+                return False
+            try:
+                self._load_model()
+            except Exception as e:
+                logger.warning(f"[WARN] Could not hot-swap delay model to {version}: {e}")
+                return False
+        logger.info(f"[OK] Hot-swapped delay model to {self.model_version}")
+        return True
+
+    def _migrate_pickle(self):
+        """Load a legacy pickled model + encoders and rewrite them as a native artifact."""
         with open(self.model_path, "rb") as f:
-            self.model = pickle.load(f)
+            model = pickle.load(f)
         with open(self.encoder_path, "rb") as f:
-            self.label_encoders = pickle.load(f)
-        self.explainer = shap.TreeExplainer(self.model)
-
-    def _save_model(self):
-        """Save model and encoders to disk."""
-        self.model_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.model_path, "wb") as f:
-            pickle.dump(self.model, f)
-        with open(self.encoder_path, "wb") as f:
-            pickle.dump(self.label_encoders, f)
-
-    def _prepare_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Engineer features from raw flight data."""
-        features = pd.DataFrame()
+            encoders = pickle.load(f)
+        self._save_model(model, encoders, _model_params(model))
+        self._load_model()
+
+    def _build_explainer(self, model: xgb.XGBClassifier):
+        """Build a shap.TreeExplainer when that backend is selected (imports shap lazily)."""
+        if self.explainer_backend != "shap":
+            return None
+        import shap
+        return shap.TreeExplainer(model)
+
+    def _build_compiled(self, model: xgb.XGBClassifier, version: str) -> Optional[CompiledTreeEnsemble]:
+        """Load (or compile and save) flattened trees for a version, guarded by a parity check."""
+        if self.scoring_backend != "compiled":
+            return None
+        compiled_dir = self.artifact_dir / version / "compiled"
+        try:
+            compiled = CompiledTreeEnsemble.load(compiled_dir)
+            if compiled is None:
+                CompiledTreeEnsemble.from_booster(model.get_booster()).save(compiled_dir)
+                compiled = CompiledTreeEnsemble.load(compiled_dir)
+            check_parity(compiled, model, FEATURE_NAMES)
+            return compiled
+        except Exception as e:
+            logger.warning(f"[WARN] Compiled scoring disabled, falling back to XGBoost: {e}")
+            return None
+
+    def _save_model(self, model: xgb.XGBClassifier, encoders: Dict[str, LabelEncoder], params: dict) -> str:
+        """Write a model as a content-addressed native artifact, point CURRENT at it and return its version.
+
+        Layout: ``<artifact_dir>/<version>/{booster.ubj, encoders.json, manifest.json}``
+        where ``version`` is a prefix of the SHA-256 over booster + vocabulary bytes.
+        The manifest also records the classifier's hyperparameters.
+        """
+        booster_bytes = bytes(model.get_booster().save_raw(raw_format="ubj"))
+        vocab = {col: [str(c) for c in le.classes_] for col, le in encoders.items()}
+        vocab_bytes = json.dumps(vocab, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+        digest = hashlib.sha256(booster_bytes + vocab_bytes).hexdigest()
+        version = digest[:16]
+        version_dir = self.artifact_dir / version
+
+        if not version_dir.exists():
+            self.artifact_dir.mkdir(parents=True, exist_ok=True)
+            tmp_dir = self.artifact_dir / f".{version}.{os.getpid()}.tmp"
+            tmp_dir.mkdir(parents=True, exist_ok=True)
+            (tmp_dir / "booster.ubj").write_bytes(booster_bytes)
+            (tmp_dir / "encoders.json").write_bytes(vocab_bytes)
+            manifest = {
+                "format": "xgboost-ubj",
+                "format_version": 1,
+                "version": version,
+                "sha256": digest,
+                "feature_names": FEATURE_NAMES,
+                "files": {"booster": "booster.ubj", "encoders": "encoders.json"},
+                "params": params,
+                "xgboost_version": xgb.__version__,
+                "created_at": datetime.utcnow().isoformat(),
+            }
+            (tmp_dir / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+            try:
+                os.replace(tmp_dir, version_dir)
+            except OSError:
+                shutil.rmtree(tmp_dir, ignore_errors=True)  # Another worker published it first
+
+        _write_atomic(self.artifact_dir / CURRENT_FILE, version)
+        return version
+
+    @staticmethod
+    def _fit_encoder(encoders: Dict[str, LabelEncoder], col: str, vals: pd.Series) -> np.ndarray:
+        """Fit a label encoder for ``col`` into ``encoders`` with a hash-based factorize and return the codes."""
+        codes, uniques = pd.factorize(vals, sort=True)
+        le = LabelEncoder()
+        le.classes_ = np.asarray(uniques, dtype=object)
+        encoders[col] = le
+        return codes
+
+    @staticmethod
+    def _encode_labels(lookup: pd.Index, vals: pd.Series) -> np.ndarray:
+        """Map labels to codes; unseen labels map to the first class."""
+        codes = lookup.get_indexer(vals)
+        codes[codes < 0] = 0
+        return codes
+
+    def _prepare_features(self, df: pd.DataFrame, encoders: Dict[str, LabelEncoder],
+                          lookups: Optional[Dict[str, pd.Index]] = None,
+                          per_row_price: bool = False) -> pd.DataFrame:
+        """Engineer features from raw flight data.
+
+        Categorical columns missing from ``encoders`` are fitted into it (training);
+        ``lookups`` are a snapshot's prebuilt label indexes.
+
+        Training normalises price by the route maximum across the dataset; inference
+        passes ``per_row_price=True`` so each flight is normalised on its own, exactly
+        as when flights were scored one at a time.
+        """
+        features = {}
 
         # Time features
-        features["hour_of_day"] = df["departure_time"].apply(
-            lambda t: int(str(t).split(":")[0]) if pd.notna(t) else 12
-        )
-        features["day_of_week"] = df["day_of_week"].fillna(3).astype(int)
-        features["month"] = df["month"].fillna(6).astype(int)
-        features["is_weekend"] = features["day_of_week"].apply(lambda d: 1 if d >= 5 else 0)
-        features["is_holiday"] = df.apply(
-            lambda row: 1 if is_indian_holiday(
-                int(row.get("month", 6)),
-                15  # Approximate mid-month
-            ) else 0, axis=1
-        )
+        departure = df["departure_time"].astype("string")
+        hours = pd.to_numeric(departure.str.split(":", n=1).str[0], errors="coerce")
+        features["hour_of_day"] = hours.fillna(12).to_numpy(dtype=int)
+        day_of_week = df["day_of_week"].fillna(3).to_numpy(dtype=int)
+        month = df["month"].fillna(6).to_numpy(dtype=int)
+        features["day_of_week"] = day_of_week
+        features["month"] = month
+        features["is_weekend"] = (day_of_week >= 5).astype(int)
+        features["is_holiday"] = np.isin(month, HOLIDAY_MONTHS).astype(int)
 
         # Numeric features
-        features["historical_delay_rate"] = df["historical_delay_rate"].fillna(0.15).astype(float)
-        features["congestion_index"] = df["congestion_index"].fillna(0.5).astype(float)
-        features["duration_mins"] = df["duration_mins"].fillna(120).astype(int)
-        features["stops"] = df["stops"].fillna(0).astype(int)
+        features["historical_delay_rate"] = df["historical_delay_rate"].fillna(0.15).to_numpy(dtype=float)
+        features["congestion_index"] = df["congestion_index"].fillna(0.5).to_numpy(dtype=float)
+        features["duration_mins"] = df["duration_mins"].fillna(120).to_numpy(dtype=int)
+        features["stops"] = df["stops"].fillna(0).to_numpy(dtype=int)
 
         # Normalised price (by route max)
         if "price" in df.columns:
-            route_key = df.get("source", "X").astype(str) + "_" + df.get("destination", "Y").astype(str)
-            max_prices = df.groupby(route_key)["price"].transform("max")
+            if per_row_price:
+                max_prices = df["price"]
+            else:
+                route_key = df.get("source", "X").astype(str) + "_" + df.get("destination", "Y").astype(str)
+                max_prices = df.groupby(route_key)["price"].transform("max")
             max_prices = max_prices.replace(0, 1)
-            features["price_normalised"] = (df["price"] / max_prices).fillna(0.5)
+            features["price_normalised"] = (df["price"] / max_prices).fillna(0.5).to_numpy(dtype=float)
         else:
-            features["price_normalised"] = 0.5
+            features["price_normalised"] = np.full(len(df), 0.5)
 
         # Encode categorical features
         for col in ["airline", "source", "destination"]:
             encoded_col = f"{col}_encoded"
             if col in df.columns:
-                if col not in self.label_encoders:
-                    self.label_encoders[col] = LabelEncoder()
-                    features[encoded_col] = self.label_encoders[col].fit_transform(
-                        df[col].fillna("Unknown").astype(str)
-                    )
+                vals = df[col].fillna("Unknown").astype(str)
+                if col not in encoders:
+                    features[encoded_col] = self._fit_encoder(encoders, col, vals)
                 else:
-                    le = self.label_encoders[col]
-                    vals = df[col].fillna("Unknown").astype(str)
-                    # Handle unseen labels
-                    known = set(le.classes_)
-                    vals_safe = vals.apply(lambda x: x if x in known else le.classes_[0])
-                    features[encoded_col] = le.transform(vals_safe)
+                    lookup = (lookups or {}).get(col)
+                    if lookup is None:
+                        lookup = pd.Index(encoders[col].classes_)
+                    features[encoded_col] = self._encode_labels(lookup, vals)
             else:
-                features[encoded_col] = 0
+                features[encoded_col] = np.zeros(len(df), dtype=int)
 
+        features = pd.DataFrame(features, index=df.index)
         return features[FEATURE_NAMES]
 
     def _generate_target(self, df: pd.DataFrame) -> pd.Series:
@@ -138,10 +429,15 @@ class FlightDelayPredictor:
         random_vals = np.random.random(len(df))
         return (random_vals < delay_rates).astype(int)
 
-    def train(self, df: pd.DataFrame) -> dict:
-        """Train XGBoost model on flight data."""
+    def train(self, df: pd.DataFrame, progress=None) -> dict:
+        """Train XGBoost model on flight data.
+
+        ``progress`` is an optional dict-like that receives ``round``/``total_rounds`` updates.
+        """
         print("[INFO] Preparing features for training...")
-        X = self._prepare_features(df)
+        # Existing vocabularies are kept, so codes stay stable across retrains
+        encoders = dict(self.label_encoders)
+        X = self._prepare_features(df, encoders)
         y = self._generate_target(df)
 
         X_train, X_test, y_train, y_test = train_test_split(
@@ -151,30 +447,21 @@ class FlightDelayPredictor:
         print(f"[INFO] Training set: {len(X_train)} | Test set: {len(X_test)}")
         print(f"[INFO] Positive rate: {y.mean():.2%}")
 
-        self.model = xgb.XGBClassifier(
-            n_estimators=200,
-            max_depth=6,
-            learning_rate=0.1,
-            subsample=0.8,
-            colsample_bytree=0.8,
-            min_child_weight=3,
-            gamma=0.1,
-            reg_alpha=0.1,
-            reg_lambda=1.0,
-            random_state=42,
-            eval_metric="logloss",
+        model = xgb.XGBClassifier(
+            **TRAIN_PARAMS,
             use_label_encoder=False,
+            callbacks=[_ProgressCallback(progress, TRAIN_PARAMS["n_estimators"])] if progress is not None else None,
         )
 
-        self.model.fit(
+        model.fit(
             X_train, y_train,
             eval_set=[(X_test, y_test)],
             verbose=False,
         )
 
         # Evaluate
-        y_pred = self.model.predict(X_test)
-        y_proba = self.model.predict_proba(X_test)[:, 1]
+        y_pred = model.predict(X_test)
+        y_proba = model.predict_proba(X_test)[:, 1]
 
         metrics = {
             "accuracy": round(accuracy_score(y_test, y_pred), 4),
@@ -184,72 +471,222 @@ class FlightDelayPredictor:
 
         print(f"[OK] Model trained -- Accuracy: {metrics['accuracy']}, F1: {metrics['f1']}, AUC: {metrics['roc_auc']}")
 
-        # Initialize SHAP explainer
-        self.explainer = shap.TreeExplainer(self.model)
-
-        # Save
-        self._save_model()
-        print(f"[OK] Model saved to {self.model_path}")
+        # Save and swap in
+        version = self._save_model(model, encoders, dict(TRAIN_PARAMS))
+        self._publish(model, encoders, version, dict(TRAIN_PARAMS))
+        print(f"[OK] Model saved to {self.artifact_dir / self.model_version}")
 
         return metrics
 
-    def predict(self, flight_features: dict) -> dict:
-        """Predict delay probability for a single flight with SHAP explanation."""
-        if self.model is None:
+    def train_incremental(self, df: pd.DataFrame, n_rounds: int = 50,
+                          holdout_size: float = 0.2, tolerance: float = 0.005) -> dict:
+        """Continue boosting the current model on new flight rows and promote it if the holdout holds up.
+
+        Uses the ``delayed`` column as the label when present (observed outcomes), otherwise
+        the simulated target. The candidate is promoted, saved as a new artifact version and
+        pointed to by CURRENT only if its holdout AUC is within ``tolerance`` of the current model.
+        """
+        current = self._snapshot
+        if current is None:
             raise RuntimeError("Model not loaded. Train or load a model first.")
 
-        df = pd.DataFrame([flight_features])
-        X = self._prepare_features(df)
+        print("[INFO] Preparing features for incremental training...")
+        X = self._prepare_features(df, current.encoders, current.lookups)
+        y = df["delayed"].astype(int) if "delayed" in df.columns else self._generate_target(df)
+
+        stratify = y if y.nunique() > 1 else None
+        X_train, X_hold, y_train, y_hold = train_test_split(
+            X, y, test_size=holdout_size, random_state=42, stratify=stratify
+        )
+        print(f"[INFO] New rows: {len(X_train)} | Holdout: {len(X_hold)}")
+
+        # Continue with the hyperparameters the current version was trained with
+        candidate = xgb.XGBClassifier(**{**current.params, "n_estimators": n_rounds})
+        candidate.fit(X_train, y_train, xgb_model=current.model.get_booster(), verbose=False)
+
+        if y_hold.nunique() < 2:
+            raise ValueError("Holdout needs both delayed and on-time rows to validate the candidate")
+        baseline_auc = roc_auc_score(y_hold, current.model.predict_proba(X_hold)[:, 1])
+        candidate_auc = roc_auc_score(y_hold, candidate.predict_proba(X_hold)[:, 1])
 
-        # Prediction
-        delay_prob = float(self.model.predict_proba(X)[0][1])
-        delay_risk_score = round(delay_prob * 100, 1)
+        promoted = candidate_auc >= baseline_auc - tolerance
+        metrics = {
+            "baseline_auc": round(float(baseline_auc), 4),
+            "candidate_auc": round(float(candidate_auc), 4),
+            "promoted": promoted,
+            "previous_version": current.version,
+        }
+
+        if promoted:
+            version = self._save_model(candidate, current.encoders, current.params)
+            self._publish(candidate, current.encoders, version, current.params)
+            print(f"[OK] Candidate promoted -- AUC {metrics['baseline_auc']} -> {metrics['candidate_auc']}")
+        else:
+            print(f"[WARN] Candidate rejected -- AUC {metrics['baseline_auc']} -> {metrics['candidate_auc']}")
 
-        # Risk level
+        metrics["version"] = self.model_version
+        return metrics
+
+    @staticmethod
+    def _risk_level(delay_prob: float) -> str:
+        """Bucket a delay probability into a risk level."""
         if delay_prob < 0.15:
-            risk_level = "low"
+            return "low"
         elif delay_prob < 0.30:
-            risk_level = "medium"
+            return "medium"
         elif delay_prob < 0.50:
-            risk_level = "high"
+            return "high"
+        return "very_high"
+
+    @staticmethod
+    def _shap_top3(shap_row: np.ndarray, feature_row: np.ndarray) -> List[dict]:
+        """Pick the three features with the largest absolute SHAP impact."""
+        feature_impacts = list(zip(FEATURE_NAMES, shap_row, feature_row))
+        feature_impacts.sort(key=lambda x: abs(x[1]), reverse=True)
+
+        return [{
+            "feature": FEATURE_LABELS.get(feat, feat),
+            "value": round(float(feat_val), 4),
+            "impact": round(float(abs(shap_val)), 4),
+            "direction": "increases delay risk" if shap_val > 0 else "decreases delay risk",
+        } for feat, shap_val, feat_val in feature_impacts[:3]]
+
+    def _shap_contributions(self, snapshot: ModelSnapshot, X: pd.DataFrame) -> Optional[np.ndarray]:
+        """Per-feature SHAP values (log-odds) for every row, or None if no explainer is available."""
+        if self.explainer_backend == "shap":
+            if snapshot.explainer is None:
+                return None
+            shap_values = snapshot.explainer.shap_values(X)
+            if isinstance(shap_values, list):
+                return np.asarray(shap_values[1])  # Class 1 (delay)
+            return np.asarray(shap_values)
+
+        # Exact TreeSHAP from the booster; the last column is the bias term
+        contribs = snapshot.model.get_booster().predict(xgb.DMatrix(X), pred_contribs=True)
+        return contribs[:, :-1]
+
+    def _predict_frame(self, snapshot: ModelSnapshot, df: pd.DataFrame) -> List[dict]:
+        """Score every row of a raw flight frame with one model call and one SHAP call."""
+        # Price is normalised per row so a flight scores the same alone or in a batch
+        X = self._prepare_features(df, snapshot.encoders, snapshot.lookups, per_row_price=True)
+        if snapshot.compiled is not None:
+            delay_probs = snapshot.compiled.predict_proba(X.values)
         else:
-            risk_level = "very_high"
+            delay_probs = snapshot.model.predict_proba(X)[:, 1]
 
-        # SHAP explanation
-        shap_top3 = []
-        if self.explainer is not None:
-            try:
-                shap_values = self.explainer.shap_values(X)
-                if isinstance(shap_values, list):
-                    sv = shap_values[1][0]  # Class 1 (delay)
-                else:
-                    sv = shap_values[0]
-
-                feature_impacts = list(zip(FEATURE_NAMES, sv, X.iloc[0].values))
-                feature_impacts.sort(key=lambda x: abs(x[1]), reverse=True)
-
-                for feat, shap_val, feat_val in feature_impacts[:3]:
-                    shap_top3.append({
-                        "feature": FEATURE_LABELS.get(feat, feat),
-                        "value": round(float(feat_val), 4),
-                        "impact": round(float(abs(shap_val)), 4),
-                        "direction": "increases delay risk" if shap_val > 0 else "decreases delay risk",
-                    })
-            except Exception:
+        # SHAP explanation for the whole batch
+        shap_matrix = None
+        shap_failed = False
+        try:
+            shap_matrix = self._shap_contributions(snapshot, X)
+        except Exception:
+            shap_failed = True
+
+        feature_matrix = X.values
+        results = []
+        for i, prob in enumerate(delay_probs):
+            delay_prob = float(prob)
+            if shap_matrix is not None:
+                shap_top3 = self._shap_top3(shap_matrix[i], feature_matrix[i])
+            elif shap_failed:
                 shap_top3 = [{"feature": "Analysis", "value": 0, "impact": 0, "direction": "unavailable"}]
+            else:
+                shap_top3 = []
+
+            results.append({
+                "delay_probability": round(delay_prob, 4),
+                "delay_risk_score": round(delay_prob * 100, 1),
+                "risk_level": self._risk_level(delay_prob),
+                "shap_top3": shap_top3,
+            })
+        return results
 
+    @staticmethod
+    def _cache_key(flight: dict) -> Optional[tuple]:
+        """Normalised model inputs for a flight, mirroring the defaults in _prepare_features."""
+        def value(name, default):
+            v = flight.get(name)
+            return default if v is None or (isinstance(v, float) and np.isnan(v)) else v
+
+        try:
+            price = flight.get("price")
+            if price is None or (isinstance(price, float) and np.isnan(price)):
+                price_key = 0.5
+            else:
+                price_key = 0.0 if price == 0 else 1.0  # per-row normalisation: price / price
+
+            return (
+                int(str(value("departure_time", "12")).split(":")[0]),
+                int(value("day_of_week", 3)),
+                int(value("month", 6)),
+                float(value("historical_delay_rate", 0.15)),
+                float(value("congestion_index", 0.5)),
+                int(value("duration_mins", 120)),
+                int(value("stops", 0)),
+                price_key,
+                str(value("airline", "Unknown")),
+                str(value("source", "Unknown")),
+                str(value("destination", "Unknown")),
+            )
+        except (TypeError, ValueError):
+            return None
+
+    def _heuristic_prediction(self, flight: dict) -> dict:
+        """Degraded score from historical delay rate and congestion, used until a model is available."""
+        rate = flight.get("historical_delay_rate")
+        congestion = flight.get("congestion_index")
+        rate = 0.15 if rate is None else rate
+        congestion = 0.5 if congestion is None else congestion
+        delay_prob = min(max(float(rate) * (0.8 + 0.4 * float(congestion)), 0.0), 0.95)
         return {
             "delay_probability": round(delay_prob, 4),
-            "delay_risk_score": delay_risk_score,
-            "risk_level": risk_level,
-            "shap_top3": shap_top3,
+            "delay_risk_score": round(delay_prob * 100, 1),
+            "risk_level": self._risk_level(delay_prob),
+            "shap_top3": [],
         }
 
-    def predict_batch(self, flights: List[dict]) -> List[dict]:
-        """Run predictions for multiple flights."""
-        results = []
-        for flight in flights:
-            prediction = self.predict(flight)
-            enriched = {**flight, **prediction}
-            results.append(enriched)
-        return results
+    def _predict_cached(self, flights: List[dict]) -> List[dict]:
+        """Serve predictions from the LRU cache and score only the misses in one batch."""
+        self.maybe_reload()
+        if self._snapshot is None:
+            return [self._heuristic_prediction(f) for f in flights]
+
+        # Read once: the version in the cache key is the model that produced the score
+        snapshot = self._snapshot
+        keys = [(snapshot.version, *key) if key is not None else None for key in map(self._cache_key, flights)]
+        predictions = [self._prediction_cache.get(k) if k is not None else None for k in keys]
+
+        missing = [i for i, p in enumerate(predictions) if p is None]
+        if missing:
+            fresh = self._predict_frame(snapshot, pd.DataFrame([flights[i] for i in missing]))
+            for i, prediction in zip(missing, fresh):
+                predictions[i] = prediction
+                unavailable = any(s.get("direction") == "unavailable" for s in prediction["shap_top3"])
+                if keys[i] is not None and not unavailable:
+                    self._prediction_cache.put(keys[i], prediction)
+
+        # Copy so callers can't mutate cached entries
+        return [{**p, "shap_top3": [dict(s) for s in p["shap_top3"]]} for p in predictions]
+
+    def cache_info(self) -> dict:
+        """Prediction cache size and hit/miss counters."""
+        return self._prediction_cache.info()
+
+    def predict(self, flight_features: dict) -> dict:
+        """Predict delay probability for a single flight with SHAP explanation."""
+        return self._predict_cached([flight_features])[0]
+
+    def predict_batch(self, flights: List[dict], use_cache: bool = True) -> List[dict]:
+        """Run predictions for multiple flights in a single vectorised pass.
+
+        Bulk jobs pass ``use_cache=False`` so they don't evict the online hot entries.
+        """
+        if not flights:
+            return []
+        if use_cache:
+            predictions = self._predict_cached(flights)
+        else:
+            snapshot = self._snapshot
+            predictions = (self._predict_frame(snapshot, pd.DataFrame(flights)) if snapshot is not None
+                           else [self._heuristic_prediction(f) for f in flights])
+        return [{**flight, **prediction} for flight, prediction in zip(flights, predictions)]
@@ -0,0 +1,167 @@
+"""
+AI Travel Guardian+ — Precomputed Delay Predictions
+Scores every Flight row offline and stores the results in the delay_predictions table,
+versioned by the model fingerprint, so flight search can read predictions instead of
+running XGBoost + SHAP online.
+"""
+
+import sys
+import json
+from datetime import date
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import select, delete, insert, inspect, update
+
+from database.database import ReadSessionLocal, engine, write_session
+from database.models import DelayPrediction
+from database.queries import FEATURE_REVISION, FLIGHT_COLUMNS, flight_to_dict
+from ml.delay_predictor import FlightDelayPredictor
+
+
+FEATURE_KEYS = (
+    "departure_time", "day_of_week", "month", "historical_delay_rate", "congestion_index",
+    "duration_mins", "stops", "price", "airline", "source", "destination",
+)
+
+
+def stored_version(model_version: str) -> str:
+    """Key stored predictions by model version and feature revision (see FEATURE_REVISION)."""
+    return f"{model_version}+f{FEATURE_REVISION}"
+
+
+def flight_features(flight: dict) -> dict:
+    """Model inputs from a flight dict (as returned by database.queries)."""
+    return {key: flight[key] for key in FEATURE_KEYS}
+
+
+def _ensure_table():
+    """Recreate delay_predictions if it predates the model_version column (it was never written to)."""
+    columns = {c["name"] for c in inspect(engine).get_columns(DelayPrediction.__tablename__)}
+    if "model_version" not in columns:
+        DelayPrediction.__table__.drop(bind=engine)
+        DelayPrediction.__table__.create(bind=engine)
+
+
+def has_predictions(db, model_version: str) -> bool:
+    """True if predictions for this model version and the current feature revision are stored."""
+    row = db.execute(
+        select(DelayPrediction.id).where(DelayPrediction.model_version == stored_version(model_version)).limit(1)
+    ).first()
+    return row is not None
+
+
+def precompute_predictions(predictor: FlightDelayPredictor, batch_size: int = 5000) -> int:
+    """Score every flight in bulk and replace stored predictions with the current model version.
+
+    Flights are streamed in batches; each scored batch is written in its own short transaction
+    under a staging version, and a final short transaction drops the old rows and publishes the
+    staged ones. Readers keep seeing the previous complete set until then. Scoring bypasses the
+    predictor's online cache.
+    """
+    if predictor.model is None or not predictor.model_version:
+        raise RuntimeError("Model not loaded. Train or load a model first.")
+
+    _ensure_table()
+    version = stored_version(predictor.model_version)
+    staging = f"{version}~staging"
+    today = date.today().isoformat()
+
+    # Leftovers of an interrupted run
+    with write_session() as writer:
+        writer.execute(delete(DelayPrediction).where(DelayPrediction.model_version == staging))
+
+    count = 0
+    db = ReadSessionLocal()
+    try:
+        result = db.execute(select(*FLIGHT_COLUMNS).execution_options(yield_per=batch_size))
+        for partition in result.partitions():
+            chunk = [flight_to_dict(row) for row in partition]
+            predictions = predictor.predict_batch([flight_features(f) for f in chunk], use_cache=False)
+            with write_session() as writer:
+                writer.execute(insert(DelayPrediction), [{
+                    "flight_id": f["id"],
+                    "model_version": staging,
+                    "prediction_date": today,
+                    "delay_prob": p["delay_probability"],
+                    "delay_risk_score": p["delay_risk_score"],
+                    "risk_level": p["risk_level"],
+                    "shap_json": json.dumps(p["shap_top3"]),
+                } for f, p in zip(chunk, predictions)])
+            count += len(chunk)
+    finally:
+        db.close()
+
+    with write_session() as writer:
+        writer.execute(delete(DelayPrediction).where(DelayPrediction.model_version != staging))
+        writer.execute(
+            update(DelayPrediction).where(DelayPrediction.model_version == staging).values(model_version=version)
+        )
+    return count
+
+
+def load_predictions(db, flight_ids: List[int], model_version: str) -> Dict[int, dict]:
+    """Fetch stored predictions for the given flights, keyed by flight id."""
+    if not flight_ids or not model_version:
+        return {}
+
+    rows = db.execute(
+        select(
+            DelayPrediction.flight_id, DelayPrediction.delay_prob,
+            DelayPrediction.delay_risk_score, DelayPrediction.risk_level,
+            DelayPrediction.shap_json,
+        ).where(
+            DelayPrediction.flight_id.in_(flight_ids),
+            DelayPrediction.model_version == stored_version(model_version),
+        )
+    ).all()
+
+    return {
+        row.flight_id: {
+            "delay_probability": row.delay_prob,
+            "delay_risk_score": row.delay_risk_score,
+            "risk_level": row.risk_level,
+            "shap_top3": json.loads(row.shap_json) if row.shap_json else [],
+        }
+        for row in rows
+    }
+
+
+def predict_flights(db, predictor: FlightDelayPredictor, flights: List[dict]) -> List[dict]:
+    """Attach delay predictions to flight dicts, reading stored results and scoring only misses online."""
+    stored = load_predictions(db, [f["id"] for f in flights if f.get("id") is not None],
+                              predictor.model_version)
+    return attach_predictions(predictor, flights, stored)
+
+
+def attach_predictions(predictor: FlightDelayPredictor, flights: List[dict],
+                       stored: Dict[int, dict]) -> List[dict]:
+    """Merge stored predictions into flight dicts, scoring the rest online (CPU-bound)."""
+    missing = [f for f in flights if f.get("id") not in stored]
+    online = iter(predictor.predict_batch(missing)) if missing else iter(())
+
+    results = []
+    for f in flights:
+        prediction = stored.get(f.get("id"))
+        results.append({**f, **prediction} if prediction is not None else next(online))
+    return results
+
+
+def main():
+    print("=" * 60)
+    print("  AI Travel Guardian+ — Precompute Delay Predictions")
+    print("=" * 60)
+
+    predictor = FlightDelayPredictor()
+    if predictor.model is None:
+        print("[ERROR] No trained model found. Run ml/train_model.py first.")
+        sys.exit(1)
+
+    count = precompute_predictions(predictor)
+    print(f"[OK] Stored {count} predictions for model {predictor.model_version}")
+
+
+if __name__ == "__main__":
+    main()
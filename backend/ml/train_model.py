@@ -1,9 +1,15 @@
 """
 AI Travel Guardian+ — Model Training Script
 Standalone script that trains the XGBoost delay prediction model on seed data.
+
+    python ml/train_model.py                          # full retrain on data/sample_flights.csv
+    python ml/train_model.py --incremental new.csv    # continue boosting on new flight rows
+
+Each run writes a new versioned artifact; running API workers hot-swap to it.
 """
 
 import sys
+import argparse
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -12,7 +18,52 @@ import pandas as pd
 from ml.delay_predictor import FlightDelayPredictor
 
 
+def train_job(csv_path: str, progress=None) -> dict:
+    """Full training run, safe to execute in a worker process; publishes a new artifact version."""
+    df = pd.read_csv(csv_path)
+    predictor = FlightDelayPredictor()
+    metrics = predictor.train(df, progress=progress)
+    metrics["version"] = predictor.model_version
+    return metrics
+
+
+def incremental(csv_path: Path, n_rounds: int):
+    """Continue boosting the current model on new rows and promote it if the holdout check passes."""
+    print("=" * 60)
+    print("  AI Travel Guardian+ — Incremental Model Training")
+    print("=" * 60)
+
+    predictor = FlightDelayPredictor()
+    if predictor.model is None:
+        print("[ERROR] No trained model found. Run a full training first.")
+        sys.exit(1)
+
+    print(f"[INFO] Loading new rows from {csv_path}")
+    df = pd.read_csv(csv_path)
+    print(f"[INFO] Loaded {len(df)} flight records")
+
+    metrics = predictor.train_incremental(df, n_rounds=n_rounds)
+    print(f"  Holdout AUC : {metrics['baseline_auc']} -> {metrics['candidate_auc']}")
+
+    if metrics["promoted"]:
+        from ml.precompute_predictions import precompute_predictions
+        count = precompute_predictions(predictor)
+        print(f"[OK] Promoted model {metrics['version']} (was {metrics['previous_version']})")
+        print(f"[OK] Stored {count} precomputed predictions for model {metrics['version']}")
+    else:
+        print(f"[SKIP] Kept model {metrics['version']}")
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Train the flight delay model")
+    parser.add_argument("--incremental", metavar="CSV", help="continue boosting on new flight rows from CSV")
+    parser.add_argument("--rounds", type=int, default=50, help="boosting rounds to add in incremental mode")
+    args = parser.parse_args()
+
+    if args.incremental:
+        incremental(Path(args.incremental), args.rounds)
+        return
+
     print("=" * 60)
     print("  AI Travel Guardian+ — XGBoost Model Training")
     print("=" * 60)
@@ -52,6 +103,10 @@ def main():
     print(f"   Delay Probability: {result['delay_probability']:.2%}")
     print(f"   Risk Level: {result['risk_level']}")
     print(f"   Top Factor: {result['shap_top3'][0]['feature'] if result['shap_top3'] else 'N/A'}")
+
+    from ml.precompute_predictions import precompute_predictions
+    count = precompute_predictions(predictor)
+    print(f"\n[OK] Stored {count} precomputed predictions for model {predictor.model_version}")
     print("\n[OK] Training complete!")
 
 
@@ -0,0 +1,159 @@
+"""
+AI Travel Guardian+ — Compiled Tree Ensemble
+Flattens a trained XGBoost binary:logistic booster into NumPy node arrays and scores
+batches by walking all trees level by level, without DMatrix construction.
+Arrays are saved as .npy files and loaded memory-mapped so workers share pages.
+"""
+
+import os
+import json
+import shutil
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import List, Optional
+
+import xgboost as xgb
+
+ARRAY_NAMES = ["roots", "left", "right", "feature", "threshold", "default_left", "value"]
+META_FILE = "meta.json"
+
+
+class CompiledTreeEnsemble:
+    """Flattened tree ensemble that reproduces XGBClassifier.predict_proba for class 1."""
+
+    def __init__(self, roots: np.ndarray, left: np.ndarray, right: np.ndarray,
+                 feature: np.ndarray, threshold: np.ndarray, default_left: np.ndarray,
+                 value: np.ndarray, base_margin: float, max_depth: int):
+        self.roots = roots
+        self.left = left
+        self.right = right
+        self.feature = feature
+        self.threshold = threshold
+        self.default_left = default_left
+        self.value = value
+        self.base_margin = base_margin
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_booster(cls, booster: xgb.Booster) -> "CompiledTreeEnsemble":
+        """Compile a booster from its JSON model dump."""
+        model = json.loads(booster.save_raw(raw_format="json"))
+        learner = model["learner"]
+
+        objective = learner["objective"]["name"]
+        if objective != "binary:logistic":
+            raise ValueError(f"Unsupported objective for compiled scoring: {objective}")
+
+        base_score = float(learner["learner_model_param"]["base_score"])
+        base_margin = float(np.log(base_score / (1.0 - base_score)))
+
+        roots, left, right, feature, threshold, default_left, value = [], [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+        for tree in learner["gradient_booster"]["model"]["trees"]:
+            lc = np.asarray(tree["left_children"], dtype=np.int32)
+            rc = np.asarray(tree["right_children"], dtype=np.int32)
+            cond = np.asarray(tree["split_conditions"], dtype=np.float32)
+            is_leaf = lc < 0
+
+            roots.append(offset)
+            left.append(np.where(is_leaf, -1, lc + offset))
+            right.append(np.where(is_leaf, -1, rc + offset))
+            feature.append(np.asarray(tree["split_indices"], dtype=np.int32))
+            threshold.append(cond)
+            default_left.append(np.asarray(tree["default_left"], dtype=bool))
+            # XGBoost stores a leaf's weight in split_conditions
+            value.append(np.where(is_leaf, cond, 0.0).astype(np.float32))
+
+            max_depth = max(max_depth, _tree_depth(lc, rc))
+            offset += len(lc)
+
+        return cls(
+            roots=np.asarray(roots, dtype=np.int32),
+            left=np.concatenate(left), right=np.concatenate(right),
+            feature=np.concatenate(feature), threshold=np.concatenate(threshold),
+            default_left=np.concatenate(default_left), value=np.concatenate(value),
+            base_margin=base_margin, max_depth=max_depth,
+        )
+
+    def predict_margin(self, X: np.ndarray) -> np.ndarray:
+        """Raw log-odds for each row of a (n_rows, n_features) matrix."""
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], len(self.roots))).copy()
+
+        for _ in range(self.max_depth):
+            left = self.left[node]
+            leaf = left < 0
+            if leaf.all():
+                break
+            fval = X[rows, self.feature[node]]
+            go_left = np.where(np.isnan(fval), self.default_left[node], fval < self.threshold[node])
+            node = np.where(leaf, node, np.where(go_left, left, self.right[node]))
+
+        return self.value[node].sum(axis=1, dtype=np.float32) + np.float32(self.base_margin)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Delay probability (class 1) for each row."""
+        margin = self.predict_margin(X).astype(np.float64)
+        return 1.0 / (1.0 + np.exp(-margin))
+
+    def save(self, path: Path):
+        """Write node arrays as .npy files (atomically replacing the directory)."""
+        path = Path(path)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.mkdir(parents=True, exist_ok=True)
+        for name in ARRAY_NAMES:
+            np.save(tmp / f"{name}.npy", getattr(self, name))
+        (tmp / META_FILE).write_text(json.dumps({
+            "base_margin": self.base_margin, "max_depth": self.max_depth,
+        }), encoding="utf-8")
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)  # Another worker published it first
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["CompiledTreeEnsemble"]:
+        """Memory-map saved node arrays; returns None if nothing has been compiled yet."""
+        path = Path(path)
+        if not (path / META_FILE).exists():
+            return None
+        meta = json.loads((path / META_FILE).read_text(encoding="utf-8"))
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in ARRAY_NAMES}
+        return cls(**arrays, base_margin=meta["base_margin"], max_depth=meta["max_depth"])
+
+
+def _tree_depth(left: np.ndarray, right: np.ndarray) -> int:
+    """Number of split levels in a single tree."""
+    depth = 0
+    frontier = [0]
+    while True:
+        children = [c for n in frontier for c in (left[n], right[n]) if c >= 0]
+        if not children:
+            return depth
+        depth += 1
+        frontier = children
+
+
+def check_parity(compiled: CompiledTreeEnsemble, model: xgb.XGBClassifier,
+                 feature_names: List[str], n_rows: int = 512, tol: float = 1e-5) -> float:
+    """Compare compiled scores with predict_proba on probe rows spanning the split thresholds.
+
+    Returns the maximum absolute probability difference; raises if it exceeds ``tol``.
+    """
+    rng = np.random.default_rng(42)
+    n_features = len(feature_names)
+    X = np.empty((n_rows, n_features), dtype=np.float32)
+    for j in range(n_features):
+        splits = np.asarray(compiled.threshold)[(np.asarray(compiled.left) >= 0) & (np.asarray(compiled.feature) == j)]
+        lo, hi = (float(splits.min()) - 1.0, float(splits.max()) + 1.0) if len(splits) else (0.0, 1.0)
+        X[:, j] = rng.uniform(lo, hi, n_rows)
+    X[rng.random(X.shape) < 0.05] = np.nan
+
+    expected = model.predict_proba(pd.DataFrame(X, columns=feature_names))[:, 1]
+    diff = float(np.max(np.abs(compiled.predict_proba(X) - expected)))
+    if diff > tol:
+        raise RuntimeError(f"Compiled tree ensemble diverges from XGBoost (max diff {diff:.2e})")
+    return diff
@@ -0,0 +1,125 @@
+"""
+AI Travel Guardian+ — Semantic Intent Cache
+Reuses parsed intents for near-duplicate user messages ("flights mumbai to delhi tomorrow"
+vs "mumbai to delhi flight tomorrow") via cosine search over a small FAISS index.
+"""
+
+import re
+import threading
+from datetime import date, timedelta
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+import faiss
+
+from rag.embedder import DataEmbedder
+from utils.helpers import RELATIVE_DATE_PHRASES, find_cities, parse_date
+
+_NUMBER_RE = re.compile(r"\d+")
+
+
+class IntentQuery(NamedTuple):
+    """An embedded user message plus the literal facts a cached intent must agree on."""
+    vector: np.ndarray
+    signature: Tuple
+
+
+def message_signature(message: str) -> Tuple:
+    """Ordered cities (names and IATA codes), numbers and relative-date phrase in a message.
+
+    Embeddings barely separate "mumbai to delhi" from "delhi to mumbai" or "3 days" from
+    "5 days", so a semantic hit is only reused when these match exactly.
+    """
+    text = message.lower()
+    cities = tuple(code for _, code in find_cities(message))
+    numbers = tuple(_NUMBER_RE.findall(text))
+    phrase = next((p for p in RELATIVE_DATE_PHRASES if p in text), None)
+    return cities, numbers, phrase
+
+
+def _shift(date_str: Optional[str], days: int) -> Optional[str]:
+    try:
+        return (date.fromisoformat(date_str) + timedelta(days=days)).isoformat()
+    except (TypeError, ValueError):
+        return date_str
+
+
+class SemanticIntentCache:
+    """Bounded FIFO of (message embedding -> raw LLM intent) searched by cosine similarity."""
+
+    def __init__(self, embedder: DataEmbedder, threshold: float = 0.92, maxsize: int = 2000,
+                 dimension: int = 384):
+        self.embedder = embedder
+        self.threshold = threshold
+        self.maxsize = maxsize
+        # Inner product over L2-normalised vectors == cosine similarity
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dimension))
+        self._entries = {}  # id -> (signature, intent, resolved_on)
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def prepare(self, message: str) -> IntentQuery:
+        """Embed a message (CPU-bound; call off the event loop)."""
+        vector = np.asarray(self.embedder.embed_query(message), dtype="float32").reshape(1, -1)
+        faiss.normalize_L2(vector)
+        return IntentQuery(vector, message_signature(message))
+
+    def lookup(self, query: IntentQuery, k: int = 5) -> Optional[dict]:
+        """Return a copy of the closest cached intent above the threshold, with dates re-resolved."""
+        with self._lock:
+            match = None
+            if self.index.ntotal:
+                scores, ids = self.index.search(query.vector, min(k, self.index.ntotal))
+                for score, entry_id in zip(scores[0], ids[0]):
+                    if score < self.threshold:
+                        break
+                    entry = self._entries.get(int(entry_id))
+                    if entry and entry[0] == query.signature:
+                        match = entry
+                        break
+            if match is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        _, intent, resolved_on = match
+        intent = dict(intent)
+        phrase = query.signature[2]
+        if phrase and date.today() != resolved_on:
+            # "tomorrow" meant a different day when this intent was parsed
+            fresh = parse_date(phrase)
+            old = parse_date(intent.get("travel_date") or "")
+            intent["travel_date"] = fresh
+            if fresh and old:
+                offset = (date.fromisoformat(fresh) - date.fromisoformat(old)).days
+                intent["return_date"] = _shift(intent.get("return_date"), offset)
+        return intent
+
+    def store(self, query: IntentQuery, intent: dict):
+        """Remember a successfully parsed intent, evicting the oldest entry when full."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self.index.add_with_ids(query.vector, np.array([entry_id], dtype="int64"))
+            self._entries[entry_id] = (query.signature, dict(intent), date.today())
+            if len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self.index.remove_ids(np.array([oldest], dtype="int64"))
+                del self._entries[oldest]
+
+    def info(self) -> dict:
+        """Cache size and hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,71 @@
+"""
+AI Travel Guardian+ — Bounded Executors
+Dedicated thread pools for blocking work called from async handlers (database sessions,
+bcrypt, delay-model inference). Each path has its own concurrency limit, so a burst on one
+cannot starve the others or block the event loop.
+"""
+
+import asyncio
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from config import settings
+
+
+class BoundedExecutor:
+    """Thread pool plus a semaphore; callers beyond ``max_workers`` wait on the event loop."""
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._semaphore = asyncio.Semaphore(max_workers)
+        # Counters are only touched on the event loop thread
+        self.running = 0
+        self.waiting = 0
+        self.completed = 0
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run ``fn(*args, **kwargs)`` in this pool once a slot is free."""
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def info(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "running": self.running,
+            "waiting": self.waiting,
+            "completed": self.completed,
+        }
+
+
+db_executor = BoundedExecutor("db", settings.DB_EXECUTOR_WORKERS)
+crypto_executor = BoundedExecutor("crypto", settings.CRYPTO_EXECUTOR_WORKERS)
+ml_executor = BoundedExecutor("ml", settings.ML_EXECUTOR_WORKERS)
+
+EXECUTORS = (db_executor, crypto_executor, ml_executor)
+
+
+def executors_info() -> dict:
+    """Per-path pool stats for the health endpoint."""
+    return {executor.name: executor.info() for executor in EXECUTORS}
+
+
+def shutdown_executors():
+    for executor in EXECUTORS:
+        executor.shutdown()
@@ -30,6 +30,24 @@ IATA_TO_CITY.update({
     "PNQ": "Pune", "LKO": "Lucknow", "COK": "Kochi",
 })
 
+# Relative date phrases understood by parse_date
+RELATIVE_DATE_PHRASES = ["today", "tomorrow", "this weekend", "next week"]
+
+# Any known city name as a whole word, longest names first ("new delhi" before "delhi")
+CITY_RE = re.compile(
+    r"\b(" + "|".join(re.escape(c) for c in sorted(CITY_TO_IATA, key=len, reverse=True)) + r")\b"
+)
+
+# Upper-case three-letter tokens; only those in IATA_TO_CITY count as airports
+IATA_RE = re.compile(r"\b[A-Z]{3}\b")
+
+
+def find_cities(message: str) -> list:
+    """(position, IATA) for every city name or known IATA code, in message order."""
+    found = [(m.start(), CITY_TO_IATA[m.group(1)]) for m in CITY_RE.finditer(message.lower())]
+    found += [(m.start(), m.group(0)) for m in IATA_RE.finditer(message) if m.group(0) in IATA_TO_CITY]
+    return sorted(found)
+
 # Indian public holidays (month, day) for delay prediction
 INDIAN_HOLIDAYS = [
     (1, 26),   # Republic Day
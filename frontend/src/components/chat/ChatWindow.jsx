@@ -13,12 +13,12 @@ const suggestions = [
 ]
 
 export default function ChatWindow() {
-    const { messages, isTyping } = useStore()
+    const { messages, isTyping, streamingText } = useStore()
     const bottomRef = useRef(null)
 
     useEffect(() => {
         bottomRef.current?.scrollIntoView({ behavior: 'smooth' })
-    }, [messages, isTyping])
+    }, [messages, isTyping, streamingText])
 
     return (
         <div className="flex-1 overflow-y-auto px-4 py-6 space-y-4 dot-grid">
@@ -62,7 +62,9 @@ export default function ChatWindow() {
             {messages.map((msg) => (
                 <MessageBubble key={msg.id} message={msg} />
             ))}
-            {isTyping && <TypingIndicator />}
+            {streamingText
+                ? <MessageBubble message={{ id: 'streaming', role: 'assistant', content: streamingText, timestamp: new Date() }} />
+                : isTyping && <TypingIndicator />}
             <div ref={bottomRef} />
         </div>
     )
@@ -20,6 +20,7 @@ export default function ChatPage() {
     const {
         sessionId, tripPlanId, messages, isTyping,
         addMessage, setIsTyping, setFlightResults,
+        appendStreamingText, clearStreamingText,
         setRiskWarnings, setTripPlan, setTripPlanId,
         rankedFlights, riskWarnings,
     } = useStore()
@@ -30,6 +31,7 @@ export default function ChatPage() {
         const ws = new ChatWebSocket(sessionId, {
             onChunk: (content) => {
                 assistantChunks.current += content
+                appendStreamingText(content)
             },
             onFlightResults: (data) => {
                 setFlightResults(data)
@@ -42,6 +44,7 @@ export default function ChatPage() {
             },
             onDone: (data) => {
                 setIsTyping(false)
+                clearStreamingText()
                 const fullText = data.full_response || assistantChunks.current
                 addMessage({ role: 'assistant', content: fullText })
                 assistantChunks.current = ''
@@ -49,6 +52,7 @@ export default function ChatPage() {
             },
             onError: (err) => {
                 setIsTyping(false)
+                clearStreamingText()
                 addMessage({ role: 'assistant', content: `Something went wrong: ${err || 'Please try again.'}` })
                 assistantChunks.current = ''
             },
@@ -80,6 +84,7 @@ export default function ChatPage() {
         addMessage({ role: 'user', content: text })
         setIsTyping(true)
         assistantChunks.current = ''
+        clearStreamingText()
         wsRef.current?.send(text, tripPlanId)
     }
 
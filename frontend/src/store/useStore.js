@@ -9,6 +9,7 @@ const useStore = create((set, get) => ({
     // Chat
     messages: [],
     isTyping: false,
+    streamingText: '',
 
     // Trip data
     tripPlan: null,
@@ -33,6 +34,9 @@ const useStore = create((set, get) => ({
 
     setIsTyping: (v) => set({ isTyping: v }),
 
+    appendStreamingText: (t) => set((s) => ({ streamingText: s.streamingText + t })),
+    clearStreamingText: () => set({ streamingText: '' }),
+
     clearMessages: () => set({ messages: [], tripPlanId: null, tripPlan: null, rankedFlights: [], recommendedFlight: null, riskWarnings: [], recommendedHotels: [], itinerary: null, foodRecommendations: [] }),
 
     setFlightResults: (data) => set({ rankedFlights: data }),